@@ -0,0 +1,165 @@
+"""
+Numeric core of BacktestEngine.run_backtest.
+
+Everything here works on plain NumPy arrays and scalars. Exit detection and the
+capital walk are compiled with numba when it is installed; without numba exits
+are found for all signals at once with blocked 2D NumPy masks instead of a
+per-bar Python loop.
+"""
+import numpy as np
+
+from src.utils._njit import njit, NUMBA_AVAILABLE
+
+# Signal side codes
+LONG, SHORT = 1, -1
+
+# Exit reason codes, indexes into EXIT_REASONS (EXIT_NO_DATA: no bar after the entry)
+EXIT_STOP_LOSS, EXIT_TAKE_PROFIT, EXIT_END_OF_DATA = 0, 1, 2
+EXIT_NO_DATA = -1
+EXIT_REASONS = ("stop_loss", "take_profit", "end_of_data")
+
+
+@njit(cache=True)
+def find_exit(lows, highs, start, stop_price, target_price, is_long):
+    """Scan forward from start for the first bar that hits the stop or target (stop wins on the same bar)"""
+    for i in range(start, len(lows)):
+        if is_long:
+            if lows[i] <= stop_price:
+                return i, EXIT_STOP_LOSS
+            if highs[i] >= target_price:
+                return i, EXIT_TAKE_PROFIT
+        else:
+            if highs[i] >= stop_price:
+                return i, EXIT_STOP_LOSS
+            if lows[i] <= target_price:
+                return i, EXIT_TAKE_PROFIT
+    return len(lows) - 1, EXIT_END_OF_DATA
+
+
+@njit(cache=True)
+def _find_exits_scan(starts, stop_prices, target_prices, is_long, lows, highs):
+    """Exit bar and reason for every signal, one early-exit scan each"""
+    n = len(starts)
+    exit_idx = np.full(n, -1, dtype=np.int64)
+    exit_codes = np.full(n, EXIT_NO_DATA, dtype=np.int8)
+    for k in range(n):
+        if starts[k] < len(lows):
+            exit_idx[k], exit_codes[k] = find_exit(lows, highs, starts[k], stop_prices[k],
+                                                   target_prices[k], is_long[k])
+    return exit_idx, exit_codes
+
+
+def _find_exits_blocked(starts, stop_prices, target_prices, is_long, lows, highs,
+                        chunk_size=512, block_size=256):
+    """
+    Same result as _find_exits_scan using 2D masks: for chunks of signals, look at the
+    next block_size bars after each entry at once and take the first hit per row. Signals
+    still open move on to the next (doubling) block, so memory stays chunk_size x block_size.
+    Signals are visited in entry order, so the rows of a chunk read overlapping bar windows.
+    """
+    n_bars = len(lows)
+    exit_idx = np.full(len(starts), -1, dtype=np.int64)
+    exit_codes = np.full(len(starts), EXIT_NO_DATA, dtype=np.int8)
+
+    # Exits are independent per signal; only the capital walk needs the original order
+    pending = np.argsort(starts, kind='stable')
+    pending = pending[starts[pending] < n_bars]
+    exit_idx[pending] = n_bars - 1
+    exit_codes[pending] = EXIT_END_OF_DATA
+
+    offset = 0
+    while pending.size:
+        still_open = []
+        for lo in range(0, pending.size, chunk_size):
+            rows = pending[lo:lo + chunk_size]
+            bars = starts[rows, None] + offset + np.arange(block_size)
+            in_range = bars < n_bars
+            bars = np.minimum(bars, n_bars - 1)
+            block_lows, block_highs = lows[bars], highs[bars]
+
+            long_rows = is_long[rows, None]
+            stops, targets = stop_prices[rows, None], target_prices[rows, None]
+            stop_hit = np.where(long_rows, block_lows <= stops, block_highs >= stops) & in_range
+            target_hit = np.where(long_rows, block_highs >= targets, block_lows <= targets) & in_range
+            hit = stop_hit | target_hit
+
+            found = hit.any(axis=1)
+            first = hit[found].argmax(axis=1)
+            exit_idx[rows[found]] = bars[found, first]
+            exit_codes[rows[found]] = np.where(stop_hit[found, first], EXIT_STOP_LOSS, EXIT_TAKE_PROFIT)
+
+            # Rows whose block already reached the last bar are end-of-data exits
+            still_open.append(rows[~found & in_range[:, -1]])
+        pending = np.concatenate(still_open)
+        offset += block_size
+        block_size *= 2
+
+    return exit_idx, exit_codes
+
+
+find_exits = _find_exits_scan if NUMBA_AVAILABLE else _find_exits_blocked
+
+
+@njit(cache=True)
+def _compound(pnl_pcts, has_exit, initial_capital, position_size):
+    """Walk capital through the trades in order, stopping once it is used up"""
+    n = len(pnl_pcts)
+    signal_idx = np.empty(n, dtype=np.int64)
+    pnls = np.empty(n, dtype=np.float64)
+    capitals = np.empty(n, dtype=np.float64)
+
+    count = 0
+    capital = initial_capital
+    for k in range(n):
+        # Skip if we don't have enough capital
+        if capital <= 0:
+            break
+        # No data after the signal
+        if not has_exit[k]:
+            continue
+
+        risk_amount = capital * position_size
+        pnl = risk_amount * pnl_pcts[k]
+        capital += pnl
+
+        signal_idx[count] = k
+        pnls[count] = pnl
+        capitals[count] = capital
+        count += 1
+
+    return count, capital, signal_idx[:count], pnls[:count], capitals[:count]
+
+
+def simulate_trades(entry_ns, sides, entry_prices, index_ns, lows, highs, closes, initial_capital,
+                    position_size, stop_loss_pct, take_profit_pct, commission, slippage):
+    """
+    Simulate the signals in order, compounding capital trade by trade.
+
+    entry_ns / index_ns are int64 nanosecond timestamps (index_ns sorted), sides are
+    LONG / SHORT codes. Returns (trade count, final capital, per-trade arrays), where
+    trade k refers to signal signal_idx[k].
+    """
+    # First bar strictly after each entry
+    starts = np.searchsorted(index_ns, entry_ns, side='right')
+    is_long = sides == LONG
+
+    stop_prices = np.where(is_long, entry_prices * (1 - stop_loss_pct), entry_prices * (1 + stop_loss_pct))
+    target_prices = np.where(is_long, entry_prices * (1 + take_profit_pct), entry_prices * (1 - take_profit_pct))
+
+    exit_idx, exit_codes = find_exits(starts, stop_prices, target_prices, is_long, lows, highs)
+    exit_prices = np.where(exit_codes == EXIT_STOP_LOSS, stop_prices,
+                           np.where(exit_codes == EXIT_TAKE_PROFIT, target_prices, closes[-1]))
+
+    # Slippage, then P&L net of commission on entry and exit
+    exit_prices = np.where(is_long, exit_prices * (1 - slippage), exit_prices * (1 + slippage))
+    pnl_pcts = np.where(is_long, (exit_prices - entry_prices) / entry_prices,
+                        (entry_prices - exit_prices) / entry_prices)
+    pnl_pcts -= commission * 2
+
+    count, capital, signal_idx, pnls, capitals = _compound(
+        pnl_pcts, exit_codes != EXIT_NO_DATA, initial_capital, position_size
+    )
+
+    return (count, capital, signal_idx, exit_idx[signal_idx], exit_codes[signal_idx],
+            exit_prices[signal_idx], stop_prices[signal_idx], target_prices[signal_idx],
+            pnls, pnl_pcts[signal_idx], capitals)
@@ -84,11 +84,17 @@ async def generate_vwap_signals(
     if signals.empty:
         result = []
     else:
-        result = signals.reset_index().to_dict(orient="records")
-        # Convert datetime objects to ISO strings
-        for item in result:
-            if "timestamp" in item and isinstance(item["timestamp"], datetime):
-                item["timestamp"] = item["timestamp"].isoformat()
+        records = signals.reset_index()
+        # Datetime timestamps to isoformat() strings in one pass over the column (tz offsets and
+        # sub-second precision kept); other values are left as they are
+        if "timestamp" in records.columns:
+            records["timestamp"] = records["timestamp"].map(
+                lambda value: value.isoformat() if isinstance(value, datetime) else value
+            )
+        # Build rows from column lists (native Python values, one tolist() per column)
+        columns = records.columns.tolist()
+        values = [records[column].tolist() for column in columns]
+        result = [dict(zip(columns, row)) for row in zip(*values)]
     
     # Cache the result
     cache[cache_key] = {
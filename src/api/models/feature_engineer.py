@@ -8,8 +8,9 @@ class FeatureEngineer:
     def create_market_context_features(self, df: pd.DataFrame, signal_timestamp: pd.Timestamp = None) -> Dict[str, float]:
         """Create market context features for signal validation - with safe data access"""
         if signal_timestamp:
-            # Use data up to the signal timestamp
-            context_data = df[df.index <= signal_timestamp].tail(100)
+            # Use data up to the signal timestamp (binary search on the sorted index instead of a full mask)
+            end = df.index.searchsorted(signal_timestamp, side='right')
+            context_data = df.iloc[max(0, end - 100):end]
         else:
             context_data = df.tail(100)
         
@@ -6,8 +6,14 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 import joblib
 import os
+from functools import lru_cache
 from typing import Dict, List, Tuple
 
+@lru_cache(maxsize=8)
+def _load_model_cached(filepath: str, mtime: float) -> Dict:
+    """Load a saved model once per (path, mtime); arrays are memory-mapped read-only and shared"""
+    return joblib.load(filepath, mmap_mode='r')
+
 class SignalClassifier:
     """ML model to validate trading signals with enhanced error handling"""
     
@@ -54,7 +60,7 @@ class SignalClassifier:
         features_list = []
         labels = []
         
-        for _, signal in historical_signals.iterrows():
+        for signal in historical_signals.to_dict('records'):
             try:
                 # Get market context features at signal time
                 market_features = feature_engineer.create_market_context_features(
@@ -92,8 +98,8 @@ class SignalClassifier:
         """Calculate if a signal was successful (1) or not (0)"""
         signal_time = signal['timestamp']
         
-        # Find data after the signal
-        future_data = historical_data[historical_data.index > signal_time]
+        # Bars after the signal, located by binary search on the sorted index (positional slice, no mask)
+        future_data = historical_data.iloc[historical_data.index.searchsorted(signal_time, side='right'):]
         
         if len(future_data) < lookforward_bars:
             return 0  # Not enough data to evaluate
@@ -218,6 +224,35 @@ class SignalClassifier:
             print(f"❌ Error predicting confidence: {e}")
             return 0.5
     
+    def predict_confidence_batch(self, signals: pd.DataFrame, current_data: pd.DataFrame, strategy_type: str) -> np.ndarray:
+        """Predict confidence scores for all signals with a single predict_proba call"""
+        default = np.full(len(signals), 0.5)
+        if not self.is_trained or self.model is None or signals.empty:
+            # Return default confidence if model not trained
+            return default
+        
+        from .feature_engineer import FeatureEngineer
+        
+        feature_engineer = FeatureEngineer()
+        
+        try:
+            # Market context is taken from the same window for every signal - build it once
+            market_features = feature_engineer.create_market_context_features(current_data)
+            
+            feature_matrix = []
+            for signal in signals.to_dict('records'):
+                strategy_features = feature_engineer.create_strategy_specific_features(
+                    current_data, signal, strategy_type
+                )
+                all_features = {**market_features, **strategy_features}
+                feature_matrix.append([all_features.get(feature_name, 0.0) for feature_name in self.feature_names])
+            
+            # Probability of class 1 (success)
+            return self.model.predict_proba(feature_matrix)[:, 1].astype(float)
+        except Exception as e:
+            print(f"❌ Error predicting confidence: {e}")
+            return default
+    
     def save_model(self, filepath: str):
         """Save trained model to file"""
         if self.is_trained:
@@ -231,7 +266,7 @@ class SignalClassifier:
     def load_model(self, filepath: str):
         """Load trained model from file"""
         if os.path.exists(filepath):
-            loaded = joblib.load(filepath)
+            loaded = _load_model_cached(filepath, os.path.getmtime(filepath))
             self.model = loaded['model']
             self.feature_names = loaded['feature_names']
             self.model_type = loaded['model_type']
@@ -0,0 +1,88 @@
+import decimal
+import math
+from datetime import datetime, date
+
+import numpy as np
+import pandas as pd
+
+
+def sanitize_for_json(obj, max_depth=10, current_depth=0):
+    """
+    Convert backtest / dashboard results into JSON-safe Python objects.
+    NaN and infinite floats become None.
+    """
+    if current_depth > max_depth:
+        return "Max depth exceeded"
+
+    # Базові типи
+    if obj is None or isinstance(obj, (str, int, bool)):
+        return obj
+    elif isinstance(obj, float):
+        if math.isinf(obj) or math.isnan(obj):
+            return None
+        return float(obj)
+
+    # Decimal
+    elif isinstance(obj, decimal.Decimal):
+        return float(obj)
+
+    # NumPy типи
+    elif isinstance(obj, np.integer):
+        return int(obj)
+    elif isinstance(obj, np.floating):
+        return sanitize_for_json(float(obj))
+    elif isinstance(obj, np.bool_):
+        return bool(obj)
+    elif isinstance(obj, np.ndarray):
+        return sanitize_for_json(obj.tolist(), max_depth, current_depth + 1)
+
+    # datetime
+    elif isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+
+    # Pandas
+    elif isinstance(obj, pd.DataFrame):
+        return sanitize_for_json(obj.to_dict(orient="records"), max_depth, current_depth + 1)
+    elif isinstance(obj, pd.Series):
+        return sanitize_for_json(obj.tolist(), max_depth, current_depth + 1)
+
+    # Словники
+    elif isinstance(obj, dict):
+        return {
+            str(k): sanitize_for_json(v, max_depth, current_depth + 1)
+            for k, v in obj.items()
+        }
+
+    # Списки, кортежі та інші ітератори
+    elif isinstance(obj, (list, tuple, set)):
+        return [
+            sanitize_for_json(item, max_depth, current_depth + 1)
+            for item in obj
+        ]
+
+    # Специфічні об'єкти Plotly
+    elif any(x in str(obj.__class__) for x in ['plotly', 'graph_objs']):
+        try:
+            if hasattr(obj, 'to_plotly_json'):
+                return sanitize_for_json(obj.to_plotly_json(), max_depth, current_depth + 1)
+            elif hasattr(obj, 'to_dict'):
+                return sanitize_for_json(obj.to_dict(), max_depth, current_depth + 1)
+        except Exception as e:
+            return f"Plotly object conversion failed: {str(e)}"
+
+    # Спробуємо отримати словникове представлення
+    try:
+        if hasattr(obj, 'to_dict'):
+            return sanitize_for_json(obj.to_dict(), max_depth, current_depth + 1)
+        elif hasattr(obj, 'dict'):
+            return sanitize_for_json(obj.dict(), max_depth, current_depth + 1)
+        elif hasattr(obj, '__dict__'):
+            return sanitize_for_json(obj.__dict__, max_depth, current_depth + 1)
+    except Exception:
+        pass
+
+    # Якщо нічого не спрацювало, спробуємо repr
+    try:
+        return str(obj)
+    except Exception:
+        return f"Unserializable object of type: {type(obj)}"
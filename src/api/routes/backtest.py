@@ -1,24 +1,12 @@
 from fastapi import APIRouter, HTTPException, Query
+import numpy as np
 import pandas as pd
 from datetime import datetime
-import math
 from ..cache import get_from_cache, save_to_cache
 from ..components import data_loader, strategy as vwap_strategy, backtester, analyzer
+from ._json_utils import sanitize_for_json
 router = APIRouter()
 
-
-
-def sanitize_for_json(obj):
-    if isinstance(obj, dict):
-        return {k: sanitize_for_json(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [sanitize_for_json(v) for v in obj]
-    elif isinstance(obj, float):
-        if math.isinf(obj) or math.isnan(obj):
-            return None
-        return obj
-    return obj
-
 @router.get("/compare")
 async def compare_assets(
     lookback: int = Query(100, ge=1, le=10000),
@@ -181,34 +169,26 @@ async def get_metrics(asset: str, lookback: int = Query(100, ge=1, le=10000)):
         
         # Створюємо сигнали на основі VWAP (аналогічно до методу run_backtest)
         vwap_series = vwap_strategy.calculate_vwap(df_subset)
-        
-        signals_data = []
-        for idx, row in df_subset.iterrows():
-            if idx not in vwap_series.index:
-                continue
-                
-            vwap_value = vwap_series.loc[idx]
-            if pd.isna(vwap_value):
-                continue
-                
-            if row['close'] > vwap_value and row['close'] > row['open']:
-                signals_data.append({
-                    'timestamp': idx,
-                    'asset': asset,
-                    'signal': 'LONG',
-                    'price': row['close'],
-                    'vwap': vwap_value
-                })
-            elif row['close'] < vwap_value and row['close'] < row['open']:
-                signals_data.append({
-                    'timestamp': idx,
-                    'asset': asset,
-                    'signal': 'SHORT',
-                    'price': row['close'],
-                    'vwap': vwap_value
-                })
-        
-        signals = pd.DataFrame(signals_data)
+        # Позиційний доступ замість vwap_series.loc[idx] на кожному рядку
+        vwap_arr = vwap_series.reindex(df_subset.index).to_numpy()
+        close_arr = df_subset['close'].to_numpy()
+        open_arr = df_subset['open'].to_numpy()
+        index = df_subset.index
+        
+        # Close above VWAP on a bullish candle -> LONG, below VWAP on a bearish one -> SHORT
+        # (rows without a VWAP compare False on both sides)
+        is_long = (close_arr > vwap_arr) & (close_arr > open_arr)
+        is_short = (close_arr < vwap_arr) & (close_arr < open_arr)
+        rows = np.flatnonzero(is_long | is_short)
+        
+        # Fixed schema built from typed columns instead of per-row dicts
+        signals = pd.DataFrame({
+            'timestamp': index[rows],
+            'asset': asset,
+            'signal': np.where(is_long[rows], 'LONG', 'SHORT').astype(object),
+            'price': close_arr[rows],
+            'vwap': vwap_arr[rows]
+        })
         
         if signals.empty:
             return {"error": f"No signals generated for {asset} with current parameters"}
@@ -1,21 +1,39 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Response
+from typing import Any, Dict
+import time
+import uuid
 from src.api.strategies import registry
 
 router = APIRouter(prefix="/api/v1/strategies", tags=["strategies"])
 
+# Status of background training jobs, keyed by job id
+_training_jobs: Dict[str, Dict[str, Any]] = {}
+
+# Finished jobs stay available for status polling this long (seconds), then are dropped
+TRAINING_JOB_TTL = 3600
+
+def _prune_training_jobs():
+    """Drop finished training jobs older than TRAINING_JOB_TTL"""
+    cutoff = time.time() - TRAINING_JOB_TTL
+    expired = [job_id for job_id, job in _training_jobs.items()
+               if job.get("finished_at", float("inf")) < cutoff]
+    for job_id in expired:
+        _training_jobs.pop(job_id, None)
+
 @router.get("/")
 async def get_all_strategies():
     """Get all available strategies"""
-    strategies = registry.list_strategies()
-    return {
-        "strategies": strategies,
-        "count": len(strategies),
-        "categories": {
-            "core": registry.get_strategies_by_type("core"),
-            "ml_validated": registry.get_strategies_by_type("ml_validated"),
-            "ensemble": registry.get_strategies_by_type("ensemble")
-        }
-    }
+    return Response(content=registry.list_strategies_json(), media_type="application/json")
+
+@router.post("/admin/reset-strategy-cache")
+async def reset_strategy_cache():
+    """Drop the cached strategy listing and backtests (call after registering new strategies or models)"""
+    from src.visualisation._backtest_cache import clear_backtest_cache
+    from src.visualisation.strategy_dashboard import clear_dashboard_cache
+    registry.clear_listing_cache()
+    clear_backtest_cache()
+    clear_dashboard_cache()
+    return {"status": "success"}
 
 @router.get("/{strategy_id}")
 async def get_strategy_info(strategy_id: str):
@@ -52,18 +70,56 @@ async def get_strategy_signals(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/train/{strategy_id}/{asset}")
-async def train_strategy_model(
-    strategy_id: str,
-    asset: str
-):
-    """Train ML model for a strategy (async endpoint)"""
+def _run_training_job(job_id: str, strategy_id: str, asset: str):
+    """Run model training outside the event loop and record the outcome"""
+    job = _training_jobs[job_id]
+    job["status"] = "running"
     try:
         from src.train_models import train_signal_validator
-        train_signal_validator(strategy_id, asset)
-        return {
-            "message": f"Training initiated for {strategy_id} on {asset}",
-            "status": "success"
-        }
+        # train_signal_validator reports failures by returning False
+        if train_signal_validator(strategy_id, asset):
+            job["status"] = "completed"
+        else:
+            job["status"] = "failed"
+            job["error"] = ("No model was saved: unknown asset, no signals from the strategy "
+                            "or a training error (see the server log)")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        job["status"] = "failed"
+        job["error"] = str(e)
+    finally:
+        job["finished_at"] = time.time()
+        # Backtests and dashboards cached before training ran on the old model
+        from src.visualisation._backtest_cache import clear_backtest_cache
+        from src.visualisation.strategy_dashboard import clear_dashboard_cache
+        clear_backtest_cache()
+        clear_dashboard_cache()
+
+@router.post("/train/{strategy_id}/{asset}", status_code=202)
+async def train_strategy_model(
+    strategy_id: str,
+    asset: str,
+    background_tasks: BackgroundTasks
+):
+    """Queue ML model training for a strategy (runs in the background)"""
+    _prune_training_jobs()
+    job_id = uuid.uuid4().hex
+    _training_jobs[job_id] = {
+        "job_id": job_id,
+        "strategy_id": strategy_id,
+        "asset": asset,
+        "status": "queued"
+    }
+    background_tasks.add_task(_run_training_job, job_id, strategy_id, asset)
+    return {
+        "message": f"Training initiated for {strategy_id} on {asset}",
+        "status": "queued",
+        "job_id": job_id
+    }
+
+@router.get("/train/status/{job_id}")
+async def get_training_status(job_id: str):
+    """Get the status of a background training job"""
+    job = _training_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Training job '{job_id}' not found")
+    return job
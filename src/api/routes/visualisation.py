@@ -1,187 +1,40 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from typing import Dict, Any
+import asyncio
 import traceback
 from src.visualisation.strategy_dashboard import StrategyDashboard
 from src.visualisation.confidence_analysis import ConfidenceAnalysis
 from src.visualisation.signal_timeline import SignalTimeline
 import pandas as pd
-import json
+import orjson
+from src.visualisation._serialization import to_json_bytes
 
 router = APIRouter(prefix="/api/v1/visualization", tags=["visualization"])
-import pprint
 
-def deep_inspect(obj, path="root"):
-    if isinstance(obj, dict):
-        for k, v in obj.items():
-            deep_inspect(v, f"{path}.{k}")
-    elif isinstance(obj, list):
-        if obj:
-            print(f"{path}: list, first element type: {type(obj[0])}")
-            if isinstance(obj[0], list):
-                print(f"  {path}: ⚠️ first element is a list of length {len(obj[0])}")
-            elif isinstance(obj[0], dict):
-                print(f"  {path}: first element keys: {list(obj[0].keys())}")
-            else:
-                print(f"  {path}: first element value: {obj[0]}")
-        else:
-            print(f"{path}: empty list")
-    else:
-        print(f"{path}: {type(obj)}")
+# Dashboard builds currently running, keyed by request parameters
+_inflight_dashboards: Dict[tuple, asyncio.Future] = {}
 
+# Chart responses are fixed until the data window advances: let clients and proxies reuse them briefly
+CHART_CACHE_CONTROL = "public, max-age=30, stale-while-revalidate=60"
 
-def sanitize_for_json(obj):
-    import pandas as pd
-    import numpy as np
-    from datetime import datetime, date
+def _not_modified(request: Request, etag: str) -> bool:
+    """True if the client already holds the response with this ETag"""
+    if_none_match = request.headers.get("if-none-match", "")
+    return if_none_match.strip() == "*" or etag in (tag.strip() for tag in if_none_match.split(","))
 
-    # Базові типи, які можна повернути як є
-    if obj is None or isinstance(obj, (str, int, float, bool)):
-        return obj
-    
-    # NumPy типи
-    elif isinstance(obj, (np.integer, np.int32, np.int64, np.int8, np.int16)):
-        return int(obj)
-    elif isinstance(obj, (np.floating, np.float32, np.float64, np.float16)):
-        return float(obj)
-    elif isinstance(obj, np.bool_):
-        return bool(obj)
-    
-    # datetime
-    elif isinstance(obj, (datetime, date)):
-        return obj.isoformat()
-    
-    # Pandas
-    elif isinstance(obj, pd.DataFrame):
-        return obj.to_dict(orient="records")
-    elif isinstance(obj, pd.Series):
-        return obj.tolist()
-    
-    # Словники
-    elif isinstance(obj, dict):
-        return {str(k): sanitize_for_json(v) for k, v in obj.items()}
-    
-    # Списки, кортежі та інші ітератори
-    elif isinstance(obj, (list, tuple, set)):
-        return [sanitize_for_json(item) for item in obj]
-    
-    # NumPy arrays
-    elif isinstance(obj, np.ndarray):
-        return obj.tolist()
-    
-    # Plotly специфічні об'єкти (якщо є)
-    elif hasattr(obj, '__class__') and 'plotly' in str(obj.__class__):
-        # Для plotly об'єктів намагаємося отримати їх словникове представлення
-        try:
-            if hasattr(obj, 'to_plotly_json'):
-                return obj.to_plotly_json()
-            elif hasattr(obj, 'to_dict'):
-                return obj.to_dict()
-        except:
-            pass
-    
-    # Спробуємо отримати словникове представлення для інших об'єктів
-    try:
-        if hasattr(obj, 'to_dict'):
-            return sanitize_for_json(obj.to_dict())
-        elif hasattr(obj, 'dict'):
-            return sanitize_for_json(obj.dict())
-    except:
-        pass
-    
-    # Якщо нічого не спрацювало, спробуємо repr або str
-    try:
-        return str(obj)
-    except:
-        return f"Unserializable object: {type(obj)}"
-    
-def improved_sanitize_for_json(obj, max_depth=10, current_depth=0):
-    """
-    Покращена версія з обмеженням глибини рекурсії
-    """
-    if current_depth > max_depth:
-        return "Max depth exceeded"
-    
-    import pandas as pd
-    import numpy as np
-    from datetime import datetime, date
-    import decimal
+async def _dashboard_payload(asset: str, days: int, initial_capital: float) -> bytes:
+    """Build dashboard JSON off the event loop, sharing one build between identical concurrent requests"""
+    key = (asset, days, initial_capital)
+    task = _inflight_dashboards.get(key)
+    if task is None:
+        task = asyncio.ensure_future(asyncio.to_thread(
+            StrategyDashboard().generate_dashboard_json, asset, days, initial_capital
+        ))
+        _inflight_dashboards[key] = task
+        task.add_done_callback(lambda _: _inflight_dashboards.pop(key, None))
+    # shield: a disconnected client must not cancel the build other requests are waiting on
+    return await asyncio.shield(task)
 
-    # Базові типи
-    if obj is None or isinstance(obj, (str, int, float, bool)):
-        return obj
-    
-    # Decimal
-    elif isinstance(obj, decimal.Decimal):
-        return float(obj)
-    
-    # NumPy типи
-    elif isinstance(obj, (np.integer, np.int32, np.int64, np.int8, np.int16)):
-        return int(obj)
-    elif isinstance(obj, (np.floating, np.float32, np.float64, np.float16)):
-        return float(obj)
-    elif isinstance(obj, np.bool_):
-        return bool(obj)
-    elif isinstance(obj, np.ndarray):
-        return obj.tolist()
-    
-    # datetime
-    elif isinstance(obj, (datetime, date)):
-        return obj.isoformat()
-    
-    # Pandas
-    elif isinstance(obj, pd.DataFrame):
-        return obj.to_dict(orient="records")
-    elif isinstance(obj, pd.Series):
-        return obj.tolist()
-    elif isinstance(obj, pd.Timestamp):
-        return obj.isoformat()
-    
-    # Словники
-    elif isinstance(obj, dict):
-        return {
-            str(k): improved_sanitize_for_json(v, max_depth, current_depth + 1) 
-            for k, v in obj.items()
-        }
-    
-    # Списки, кортежі та інші ітератори
-    elif isinstance(obj, (list, tuple, set)):
-        return [
-            improved_sanitize_for_json(item, max_depth, current_depth + 1) 
-            for item in obj
-        ]
-    
-    # Специфічні об'єкти Plotly
-    elif hasattr(obj, '__class__') and any(x in str(obj.__class__) for x in ['plotly', 'graph_objs']):
-        try:
-            if hasattr(obj, 'to_plotly_json'):
-                result = obj.to_plotly_json()
-                return improved_sanitize_for_json(result, max_depth, current_depth + 1)
-            elif hasattr(obj, 'to_dict'):
-                result = obj.to_dict()
-                return improved_sanitize_for_json(result, max_depth, current_depth + 1)
-        except Exception as e:
-            return f"Plotly object conversion failed: {str(e)}"
-    
-    # Спробуємо отримати словникове представлення
-    try:
-        if hasattr(obj, 'to_dict'):
-            result = obj.to_dict()
-            return improved_sanitize_for_json(result, max_depth, current_depth + 1)
-        elif hasattr(obj, 'dict'):
-            result = obj.dict()
-            return improved_sanitize_for_json(result, max_depth, current_depth + 1)
-        elif hasattr(obj, '__dict__'):
-            result = obj.__dict__
-            return improved_sanitize_for_json(result, max_depth, current_depth + 1)
-    except Exception as e:
-        pass
-    
-    # Якщо нічого не спрацювало, спробуємо repr
-    try:
-        return str(obj)
-    except:
-        return f"Unserializable object of type: {type(obj)}"
-    
 @router.get("/strategy-dashboard/{asset}")
 async def get_strategy_dashboard(
     asset: str,
@@ -190,38 +43,8 @@ async def get_strategy_dashboard(
 ):
     """Get comprehensive strategy performance dashboard"""
     try:
-
-        dashboard = StrategyDashboard()
-        result = dashboard.generate_dashboard(asset, days, initial_capital)
-        
-        print("=== DASHBOARD RESULT TYPE ===", type(result))
-        if isinstance(result, dict):
-            for k, v in result.items():
-                print(f"KEY: {k}, TYPE: {type(v)}")
-                if isinstance(v, list):
-                    print(f"  First element type: {type(v[0]) if v else 'empty'}")
-        
-        # Використовуємо покращену функцію
-        sanitized_result = improved_sanitize_for_json(result)
-        
-        # Додаткова перевірка
-        import json
-        try:
-            # Спробуємо серіалізувати для перевірки
-            json.dumps(sanitized_result)
-            print("✅ Sanitization successful - result is JSON serializable")
-        except Exception as e:
-            print(f"❌ Sanitization failed: {e}")
-            # Якщо не вдалося, повертаємо спрощену версію
-            return {
-                "asset": asset,
-                "period_days": days,
-                "initial_capital": initial_capital,
-                "error": "Could not serialize full dashboard data",
-                "available_strategies": list(result.get('metrics', {}).keys()) if isinstance(result, dict) else []
-            }
-        
-        return sanitized_result
+        payload = await _dashboard_payload(asset, days, initial_capital)
+        return Response(content=payload, media_type="application/json")
         
     except Exception as e:
         print("❌ Error in get_strategy_dashboard:", e)
@@ -235,7 +58,8 @@ async def get_available_strategies(
     """Get list of available strategies with ML support"""
     try:
         dashboard = StrategyDashboard()
-        result = dashboard.generate_dashboard(asset, 7, 10000)
+        # Only the metrics are read here, so no charts are built
+        result = dashboard.generate_dashboard(asset, 7, 10000, charts_wanted=set())
         available_strategies = []
         if 'metrics' in result:
             for strategy_id in result['metrics'].keys():
@@ -255,6 +79,7 @@ async def get_available_strategies(
 
 @router.get("/confidence-analysis/{strategy_id}/{asset}")
 async def get_confidence_analysis(
+    request: Request,
     strategy_id: str,
     asset: str,
     days: int = Query(30, description="Number of days to analyze")
@@ -262,13 +87,18 @@ async def get_confidence_analysis(
     """Get ML confidence analysis for a specific strategy"""
     try:
            analysis = ConfidenceAnalysis()
-           result = analysis.generate_analysis(strategy_id, asset, days)
-           return sanitize_for_json(result)
+           etag = analysis.etag(strategy_id, asset, days)
+           headers = {"ETag": etag, "Cache-Control": CHART_CACHE_CONTROL}
+           if _not_modified(request, etag):
+               return Response(status_code=304, headers=headers)
+           payload = analysis.generate_analysis_json(strategy_id, asset, days)
+           return Response(content=payload, media_type="application/json", headers=headers)
     except Exception as e:
         return {"error": str(e), "traceback": traceback.format_exc()}
 
 @router.get("/signal-timeline/{strategy_id}/{asset}")
 async def get_signal_timeline(
+    request: Request,
     strategy_id: str,
     asset: str,
     days: int = Query(30, description="Number of days to analyze")
@@ -278,18 +108,16 @@ async def get_signal_timeline(
         print(f"📈 Generating signal timeline for {strategy_id} on {asset}")
         
         timeline = SignalTimeline()
+        etag = timeline.etag(strategy_id, asset, days)
+        headers = {"ETag": etag, "Cache-Control": CHART_CACHE_CONTROL}
+        if _not_modified(request, etag):
+            return Response(status_code=304, headers=headers)
         result = timeline.generate_timeline(strategy_id, asset, days)
         
-        print(f"✅ Signal timeline generated, sanitizing for JSON...")
-        
-        # ВИПРАВЛЕННЯ: Використовуємо нашу функцію sanitize_for_json
-        sanitized_result = improved_sanitize_for_json(result)
-        
-        # Додаткова перевірка
+        # Encoded once by orjson; the chart arrays are written straight from numpy
         try:
-            json.dumps(sanitized_result)
-            print("✅ Sanitization successful")
-        except Exception as json_error:
+            payload = to_json_bytes(result)
+        except orjson.JSONEncodeError as json_error:
             print(f"❌ JSON serialization failed: {json_error}")
             # Повертаємо спрощену версію
             return {
@@ -300,7 +128,8 @@ async def get_signal_timeline(
                 "available_data": list(result.keys()) if isinstance(result, dict) else "Not a dict"
             }
         
-        return sanitized_result
+        print(f"✅ Signal timeline generated")
+        return Response(content=payload, media_type="application/json", headers=headers)
         
     except Exception as e:
         print(f"❌ Error in signal timeline: {e}")
@@ -315,25 +144,21 @@ async def test_serialization(asset: str):
         dashboard = StrategyDashboard()
         result = dashboard.generate_dashboard(asset, 7, 10000)  # Менше днів для швидшого тесту
         
-        def find_problematic_types(obj, path="root"):
-            problematic = []
-            
-            if isinstance(obj, dict):
-                for k, v in obj.items():
-                    problematic.extend(find_problematic_types(v, f"{path}.{k}"))
-            elif isinstance(obj, (list, tuple)):
-                for i, item in enumerate(obj[:5]):  # Перевіряємо тільки перші 5 елементів
-                    problematic.extend(find_problematic_types(item, f"{path}[{i}]"))
-            else:
-                # Перевіряємо, чи можна серіалізувати цей об'єкт
-                try:
-                    json.dumps(obj)
-                except:
-                    problematic.append(f"{path}: {type(obj)} - {str(obj)[:100]}")
-            
-            return problematic
-        
-        issues = find_problematic_types(result)
+        # Один прохід orjson: default викликається лише для об'єктів, які не серіалізуються
+        issues = []
+
+        def record_problematic_type(obj):
+            issues.append(f"{type(obj)} - {str(obj)[:100]}")
+            return None
+
+        try:
+            orjson.dumps(
+                result,
+                default=record_problematic_type,
+                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            )
+        except orjson.JSONEncodeError as e:
+            issues.append(f"Serialization aborted: {e}")
         
         return {
             "asset": asset,
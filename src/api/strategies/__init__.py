@@ -1,15 +1,135 @@
+import copy
+import importlib
+from collections.abc import Mapping
+from functools import lru_cache
+from types import MappingProxyType
+import orjson
 from .base_strategy import BaseStrategy
-from .vwap_strategy import VWAPStrategy
-from .sma_crossover import SMACrossover
-from .rsi_oversold import RSIStrategy
-from .mean_reversion import MeanReversionStrategy
-from .signal_validator import SignalValidatorStrategy
+
+__all__ = [
+    "registry",
+    "StrategyRegistry",
+    "BaseStrategy",
+    "VWAPStrategy",
+    "SMACrossover",
+    "RSIStrategy",
+    "MeanReversionStrategy",
+    "SignalValidatorStrategy",
+]
+
+# Strategy classes are imported on first use, so that code paths that never touch
+# the ML-validated strategies do not pay for importing sklearn/xgboost
+_STRATEGY_CLASSES = {
+    "VWAPStrategy": (".vwap_strategy", "VWAPStrategy"),
+    "SMACrossover": (".sma_crossover", "SMACrossover"),
+    "RSIStrategy": (".rsi_oversold", "RSIStrategy"),
+    "MeanReversionStrategy": (".mean_reversion", "MeanReversionStrategy"),
+    "SignalValidatorStrategy": (".signal_validator", "SignalValidatorStrategy"),
+}
+
+def _import_class(module_path: str, class_name: str):
+    return getattr(importlib.import_module(module_path, __name__), class_name)
+
+def __getattr__(name: str):
+    if name in _STRATEGY_CLASSES:
+        return _import_class(*_STRATEGY_CLASSES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _frozen(spec):
+    """Read-only copy of a parameter spec: dicts become MappingProxyType, lists tuples"""
+    if isinstance(spec, dict):
+        return MappingProxyType({key: _frozen(value) for key, value in spec.items()})
+    if isinstance(spec, list):
+        return tuple(_frozen(value) for value in spec)
+    return spec
+
+def _plain(spec):
+    """Plain dict/list copy of a frozen parameter spec (for API responses)"""
+    if isinstance(spec, Mapping):
+        return {key: _plain(value) for key, value in spec.items()}
+    if isinstance(spec, tuple):
+        return [_plain(value) for value in spec]
+    return spec
+
+# ========== PARAMETER SPECS ==========
+
+_VWAP_IB_PARAMS = _frozen({
+    "ib_start": {"type": "time", "default": "13:30", "description": "Initial Balance start time"},
+    "ib_end": {"type": "time", "default": "14:30", "description": "Initial Balance end time"},
+    "session_start": {"type": "time", "default": "22:00", "description": "Trading session start"},
+    "session_end": {"type": "time", "default": "20:00", "description": "Trading session end"},
+    "stop_loss": {"type": "percent", "default": 0.5, "min": 0.1, "max": 5.0},
+    "take_profit": {"type": "percent", "default": 1.0, "min": 0.5, "max": 10.0}
+})
+
+_SMA_CROSSOVER_PARAMS = _frozen({
+    "fast_period": {"type": "number", "default": 10, "min": 5, "max": 50},
+    "slow_period": {"type": "number", "default": 20, "min": 10, "max": 100},
+    "stop_loss": {"type": "percent", "default": 1.0, "min": 0.1, "max": 5.0},
+    "take_profit": {"type": "percent", "default": 2.0, "min": 0.5, "max": 10.0}
+})
+
+_RSI_OVERSOLD_PARAMS = _frozen({
+    "rsi_period": {"type": "number", "default": 14, "min": 7, "max": 21},
+    "oversold": {"type": "number", "default": 30, "min": 20, "max": 40},
+    "overbought": {"type": "number", "default": 70, "min": 60, "max": 80},
+    "stop_loss": {"type": "percent", "default": 1.0, "min": 0.1, "max": 5.0},
+    "take_profit": {"type": "percent", "default": 2.0, "min": 0.5, "max": 10.0}
+})
+
+_MEAN_REVERSION_PARAMS = _frozen({
+    "bb_period": {"type": "number", "default": 20, "min": 10, "max": 50},
+    "std_dev": {"type": "number", "default": 2.0, "min": 1.5, "max": 3.0},
+    "stop_loss": {"type": "percent", "default": 1.0, "min": 0.1, "max": 5.0},
+    "take_profit": {"type": "percent", "default": 1.5, "min": 0.5, "max": 10.0}
+})
+
+_VWAP_ML_VALIDATED_PARAMS = _frozen({
+    "base_strategy": {"type": "string", "default": "vwap_ib", "options": ["vwap_ib"], "description": "Base strategy to validate"},
+    "confidence_threshold": {"type": "float", "default": 0.65, "min": 0.5, "max": 0.95, "description": "Minimum ML confidence to accept signal"},
+    "ml_model_type": {"type": "select", "default": "random_forest", "options": ["random_forest", "xgboost", "logistic_regression"], "description": "ML model type for validation"},
+    "fallback_to_original": {"type": "boolean", "default": True, "description": "Use original signal if ML model not trained"},
+    "stop_loss": {"type": "percent", "default": 0.5, "min": 0.1, "max": 5.0},
+    "take_profit": {"type": "percent", "default": 1.0, "min": 0.5, "max": 10.0}
+})
+
+_SMA_ML_VALIDATED_PARAMS = _frozen({
+    "base_strategy": {"type": "string", "default": "sma_crossover", "options": ["sma_crossover"], "description": "Base strategy to validate"},
+    "confidence_threshold": {"type": "float", "default": 0.65, "min": 0.5, "max": 0.95, "description": "Minimum ML confidence to accept signal"},
+    "ml_model_type": {"type": "select", "default": "random_forest", "options": ["random_forest", "xgboost", "logistic_regression"], "description": "ML model type for validation"},
+    "fallback_to_original": {"type": "boolean", "default": True, "description": "Use original signal if ML model not trained"},
+    "stop_loss": {"type": "percent", "default": 1.0, "min": 0.1, "max": 5.0},
+    "take_profit": {"type": "percent", "default": 2.0, "min": 0.5, "max": 10.0}
+})
+
+_RSI_ML_VALIDATED_PARAMS = _frozen({
+    "base_strategy": {"type": "string", "default": "rsi_oversold", "options": ["rsi_oversold"], "description": "Base strategy to validate"},
+    "confidence_threshold": {"type": "float", "default": 0.65, "min": 0.5, "max": 0.95, "description": "Minimum ML confidence to accept signal"},
+    "ml_model_type": {"type": "select", "default": "random_forest", "options": ["random_forest", "xgboost", "logistic_regression"], "description": "ML model type for validation"},
+    "fallback_to_original": {"type": "boolean", "default": True, "description": "Use original signal if ML model not trained"},
+    "stop_loss": {"type": "percent", "default": 1.0, "min": 0.1, "max": 5.0},
+    "take_profit": {"type": "percent", "default": 2.0, "min": 0.5, "max": 10.0}
+})
+
+_MEAN_REVERSION_ML_VALIDATED_PARAMS = _frozen({
+    "base_strategy": {"type": "string", "default": "mean_reversion", "options": ["mean_reversion"], "description": "Base strategy to validate"},
+    "confidence_threshold": {"type": "float", "default": 0.65, "min": 0.5, "max": 0.95, "description": "Minimum ML confidence to accept signal"},
+    "ml_model_type": {"type": "select", "default": "random_forest", "options": ["random_forest", "xgboost", "logistic_regression"], "description": "ML model type for validation"},
+    "fallback_to_original": {"type": "boolean", "default": True, "description": "Use original signal if ML model not trained"},
+    "stop_loss": {"type": "percent", "default": 1.0, "min": 0.1, "max": 5.0},
+    "take_profit": {"type": "percent", "default": 1.5, "min": 0.5, "max": 10.0}
+})
 
 class StrategyRegistry:
     """Registry for all available trading strategies"""
     
     def __init__(self):
         self._strategies = {}
+        # Strategy instances are reused for repeated (class, parameters) lookups,
+        # e.g. parameter sweeps that rebuild the same ML-validated strategy
+        self._make_strategy = lru_cache(maxsize=128)(self._build_strategy)
+        self._list_cache = None
+        self._list_json = None
         self._register_default_strategies()
     
     def _register_default_strategies(self):
@@ -20,60 +140,37 @@ class StrategyRegistry:
         # VWAP + Initial Balance
         self.register(
             "vwap_ib",
-            VWAPStrategy,
+            _STRATEGY_CLASSES["VWAPStrategy"],
             "VWAP + Initial Balance",
             "Breakout strategy using VWAP and initial balance range",
-            {
-                "ib_start": {"type": "time", "default": "13:30", "description": "Initial Balance start time"},
-                "ib_end": {"type": "time", "default": "14:30", "description": "Initial Balance end time"},
-                "session_start": {"type": "time", "default": "22:00", "description": "Trading session start"},
-                "session_end": {"type": "time", "default": "20:00", "description": "Trading session end"},
-                "stop_loss": {"type": "percent", "default": 0.5, "min": 0.1, "max": 5.0},
-                "take_profit": {"type": "percent", "default": 1.0, "min": 0.5, "max": 10.0}
-            }
+            _VWAP_IB_PARAMS
         )
         
         # SMA Crossover
         self.register(
-            "sma_crossover", 
-            SMACrossover,
+            "sma_crossover",
+            _STRATEGY_CLASSES["SMACrossover"],
             "SMA Crossover",
             "Buy when fast SMA crosses above slow SMA, sell when crosses below",
-            {
-                "fast_period": {"type": "number", "default": 10, "min": 5, "max": 50},
-                "slow_period": {"type": "number", "default": 20, "min": 10, "max": 100},
-                "stop_loss": {"type": "percent", "default": 1.0, "min": 0.1, "max": 5.0},
-                "take_profit": {"type": "percent", "default": 2.0, "min": 0.5, "max": 10.0}
-            }
+            _SMA_CROSSOVER_PARAMS
         )
         
         # RSI Oversold
         self.register(
             "rsi_oversold",
-            RSIStrategy,
+            _STRATEGY_CLASSES["RSIStrategy"],
             "RSI Oversold",
             "Buy when RSI is oversold, sell when overbought",
-            {
-                "rsi_period": {"type": "number", "default": 14, "min": 7, "max": 21},
-                "oversold": {"type": "number", "default": 30, "min": 20, "max": 40},
-                "overbought": {"type": "number", "default": 70, "min": 60, "max": 80},
-                "stop_loss": {"type": "percent", "default": 1.0, "min": 0.1, "max": 5.0},
-                "take_profit": {"type": "percent", "default": 2.0, "min": 0.5, "max": 10.0}
-            }
+            _RSI_OVERSOLD_PARAMS
         )
         
         # Mean Reversion
         self.register(
             "mean_reversion",
-            MeanReversionStrategy,
+            _STRATEGY_CLASSES["MeanReversionStrategy"],
             "Bollinger Bands Mean Reversion", 
             "Buy at lower band, sell at upper band",
-            {
-                "bb_period": {"type": "number", "default": 20, "min": 10, "max": 50},
-                "std_dev": {"type": "number", "default": 2.0, "min": 1.5, "max": 3.0},
-                "stop_loss": {"type": "percent", "default": 1.0, "min": 0.1, "max": 5.0},
-                "take_profit": {"type": "percent", "default": 1.5, "min": 0.5, "max": 10.0}
-            }
+            _MEAN_REVERSION_PARAMS
         )
         
         # ========== ML VALIDATED STRATEGIES ==========
@@ -81,75 +178,54 @@ class StrategyRegistry:
         # VWAP + ML Validation
         self.register(
             "vwap_ml_validated",
-            SignalValidatorStrategy,
+            _STRATEGY_CLASSES["SignalValidatorStrategy"],
             "VWAP + ML Validation", 
             "VWAP strategy filtered by ML signal validation - answers 'Should I trust this VWAP signal?'",
-            {
-                "base_strategy": {"type": "string", "default": "vwap_ib", "options": ["vwap_ib"], "description": "Base strategy to validate"},
-                "confidence_threshold": {"type": "float", "default": 0.65, "min": 0.5, "max": 0.95, "description": "Minimum ML confidence to accept signal"},
-                "ml_model_type": {"type": "select", "default": "random_forest", "options": ["random_forest", "xgboost", "logistic_regression"], "description": "ML model type for validation"},
-                "fallback_to_original": {"type": "boolean", "default": True, "description": "Use original signal if ML model not trained"},
-                "stop_loss": {"type": "percent", "default": 0.5, "min": 0.1, "max": 5.0},
-                "take_profit": {"type": "percent", "default": 1.0, "min": 0.5, "max": 10.0}
-            }
+            _VWAP_ML_VALIDATED_PARAMS
         )
         
         # SMA + ML Validation
         self.register(
-            "sma_ml_validated", 
-            SignalValidatorStrategy,
+            "sma_ml_validated",
+            _STRATEGY_CLASSES["SignalValidatorStrategy"],
             "SMA + ML Validation",
             "SMA crossover strategy filtered by ML signal validation",
-            {
-                "base_strategy": {"type": "string", "default": "sma_crossover", "options": ["sma_crossover"], "description": "Base strategy to validate"},
-                "confidence_threshold": {"type": "float", "default": 0.65, "min": 0.5, "max": 0.95, "description": "Minimum ML confidence to accept signal"},
-                "ml_model_type": {"type": "select", "default": "random_forest", "options": ["random_forest", "xgboost", "logistic_regression"], "description": "ML model type for validation"},
-                "fallback_to_original": {"type": "boolean", "default": True, "description": "Use original signal if ML model not trained"},
-                "stop_loss": {"type": "percent", "default": 1.0, "min": 0.1, "max": 5.0},
-                "take_profit": {"type": "percent", "default": 2.0, "min": 0.5, "max": 10.0}
-            }
+            _SMA_ML_VALIDATED_PARAMS
         )
         
         # RSI + ML Validation
         self.register(
             "rsi_ml_validated",
-            SignalValidatorStrategy,
+            _STRATEGY_CLASSES["SignalValidatorStrategy"],
             "RSI + ML Validation",
             "RSI strategy filtered by ML signal validation", 
-            {
-                "base_strategy": {"type": "string", "default": "rsi_oversold", "options": ["rsi_oversold"], "description": "Base strategy to validate"},
-                "confidence_threshold": {"type": "float", "default": 0.65, "min": 0.5, "max": 0.95, "description": "Minimum ML confidence to accept signal"},
-                "ml_model_type": {"type": "select", "default": "random_forest", "options": ["random_forest", "xgboost", "logistic_regression"], "description": "ML model type for validation"},
-                "fallback_to_original": {"type": "boolean", "default": True, "description": "Use original signal if ML model not trained"},
-                "stop_loss": {"type": "percent", "default": 1.0, "min": 0.1, "max": 5.0},
-                "take_profit": {"type": "percent", "default": 2.0, "min": 0.5, "max": 10.0}
-            }
+            _RSI_ML_VALIDATED_PARAMS
         )
         
         # Mean Reversion + ML Validation
         self.register(
             "mean_reversion_ml_validated",
-            SignalValidatorStrategy,
+            _STRATEGY_CLASSES["SignalValidatorStrategy"],
             "Mean Reversion + ML Validation",
             "Mean reversion strategy filtered by ML signal validation",
-            {
-                "base_strategy": {"type": "string", "default": "mean_reversion", "options": ["mean_reversion"], "description": "Base strategy to validate"},
-                "confidence_threshold": {"type": "float", "default": 0.65, "min": 0.5, "max": 0.95, "description": "Minimum ML confidence to accept signal"},
-                "ml_model_type": {"type": "select", "default": "random_forest", "options": ["random_forest", "xgboost", "logistic_regression"], "description": "ML model type for validation"},
-                "fallback_to_original": {"type": "boolean", "default": True, "description": "Use original signal if ML model not trained"},
-                "stop_loss": {"type": "percent", "default": 1.0, "min": 0.1, "max": 5.0},
-                "take_profit": {"type": "percent", "default": 1.5, "min": 0.5, "max": 10.0}
-            }
+            _MEAN_REVERSION_ML_VALIDATED_PARAMS
         )
     
     def register(self, strategy_id: str, strategy_class, name: str, description: str, parameters: dict):
-        """Register a new strategy"""
+        """Register a new strategy (a class, or a lazy (module_path, class_name) pair)"""
         self._strategies[strategy_id] = {
             "class": strategy_class,
             "name": name,
             "description": description,
             "parameters": parameters
         }
+        self._make_strategy.cache_clear()
+        self.clear_listing_cache()
+    
+    def clear_listing_cache(self):
+        """Drop the cached strategy listing and its JSON (register() does this itself)"""
+        self._list_cache = None
+        self._list_json = None
     
     def get_strategy(self, strategy_id: str, parameters: dict = None):
         """Get strategy instance by ID"""
@@ -157,25 +233,63 @@ class StrategyRegistry:
             raise ValueError(f"Strategy '{strategy_id}' not found")
         
         strategy_info = self._strategies[strategy_id]
+        parameters = dict(parameters) if parameters else {}
         
         # For ML validated strategies, ensure base_strategy parameter is set
-        if strategy_id.endswith('_ml_validated') and parameters:
+        if strategy_id.endswith('_ml_validated'):
             base_strategy_name = strategy_info["parameters"]["base_strategy"]["default"]
-            if 'base_strategy' not in parameters:
-                parameters['base_strategy'] = base_strategy_name
+            parameters.setdefault('base_strategy', base_strategy_name)
+        
+        strategy_class = strategy_info["class"]
+        if isinstance(strategy_class, tuple):
+            strategy_class = strategy_info["class"] = _import_class(*strategy_class)
+        try:
+            params_key = tuple(sorted(parameters.items()))
+            hash(params_key)
+        except TypeError:
+            # Unhashable parameter values - build without caching
+            return strategy_class(parameters or None)
         
-        return strategy_info["class"](parameters)
+        if not isinstance(strategy_class, type):
+            # Ad-hoc factories (e.g. the legacy backtest's dummy strategy) are not cached
+            return strategy_class(parameters or None)
+        return self._make_strategy(strategy_class, params_key)
+    
+    def _build_strategy(self, strategy_class, params_key: tuple):
+        """Instantiate a strategy class from a frozen parameters key"""
+        return strategy_class(dict(params_key) or None)
     
     def list_strategies(self):
         """List all available strategies"""
-        return {
-            strategy_id: {
-                "name": info["name"],
-                "description": info["description"],
-                "parameters": info["parameters"]
+        if self._list_cache is None:
+            self._list_cache = {
+                strategy_id: {
+                    "name": info["name"],
+                    "description": info["description"],
+                    "parameters": _plain(info["parameters"])
+                }
+                for strategy_id, info in self._strategies.items()
             }
-            for strategy_id, info in self._strategies.items()
-        }
+        # Deep copy: callers may mutate the entries without touching the cached listing
+        return copy.deepcopy(self._list_cache)
+    
+    def list_strategies_json(self) -> bytes:
+        """
+        Strategy listing with its count and categories, serialized once to JSON bytes for
+        the API (rebuilt after the next register() call)
+        """
+        if self._list_json is None:
+            strategies = self.list_strategies()
+            self._list_json = orjson.dumps({
+                "strategies": strategies,
+                "count": len(strategies),
+                "categories": {
+                    "core": self.get_strategies_by_type("core"),
+                    "ml_validated": self.get_strategies_by_type("ml_validated"),
+                    "ensemble": self.get_strategies_by_type("ensemble")
+                }
+            })
+        return self._list_json
     
     def get_strategy_info(self, strategy_id: str):
         """Get detailed info about a specific strategy"""
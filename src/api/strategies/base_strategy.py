@@ -5,6 +5,10 @@ import pandas as pd
 class BaseStrategy(ABC):
     """Base class for all trading strategies"""
     
+    # Parameters that change generate_signals output; None means all of them.
+    # Lets parameter sweeps reuse signals across combinations that differ only elsewhere.
+    signal_param_keys = None
+    
     def __init__(self, parameters: Dict[str, Any] = None):
         self.parameters = parameters or {}
         self.name = self.__class__.__name__
@@ -1,6 +1,7 @@
 import pandas as pd
 import numpy as np
 from .base_strategy import BaseStrategy
+from src.utils._njit import njit
 
 class MeanReversionStrategy(BaseStrategy):
     """Bollinger Bands Mean Reversion Strategy"""
@@ -17,69 +18,137 @@ class MeanReversionStrategy(BaseStrategy):
     
     def calculate_bollinger_bands(self, prices, window=20, num_std=2):
         """Calculate Bollinger Bands"""
-        rolling_mean = prices.rolling(window=window).mean()
-        rolling_std = prices.rolling(window=window).std()
-        upper_band = rolling_mean + (rolling_std * num_std)
-        lower_band = rolling_mean - (rolling_std * num_std)
-        return upper_band, rolling_mean, lower_band
+        upper_band, rolling_mean, lower_band = _bbands_loop(
+            prices.to_numpy(dtype=np.float64), int(window), float(num_std)
+        )
+        return (
+            pd.Series(upper_band, index=prices.index),
+            pd.Series(rolling_mean, index=prices.index),
+            pd.Series(lower_band, index=prices.index),
+        )
     
     def generate_signals(self, df: pd.DataFrame, asset: str) -> pd.DataFrame:
         """Generate signals based on Bollinger Bands mean reversion"""
-        df = df.copy()
-        
         bb_period = self.parameters["bb_period"]
         std_dev = self.parameters["std_dev"]
         
         # Calculate Bollinger Bands
-        df['bb_upper'], df['bb_middle'], df['bb_lower'] = self.calculate_bollinger_bands(
-            df['close'], bb_period, std_dev
-        )
+        close = df['close'].to_numpy(dtype=np.float64)
+        ts_arr = df.index.values  # datetime64 view of the index, no Timestamp boxing
+        upper, middle, lower = _bbands_loop(close, int(bb_period), float(std_dev))
+        
+        # Entry bars (NaN bands compare False, so warm-up bars never fire)
+        long_entry = close <= lower
+        short_entry = (close >= upper) & ~long_entry
+        # A LONG is closed once price is back at the middle band, a SHORT likewise
+        long_exit = (close >= middle) & ~long_entry
+        short_exit = (close <= middle) & ~short_entry
+        
+        # Position held after each bar: the last entry is more recent than the last exit
+        bars = np.arange(len(df))
+        in_long = _last_true(long_entry, bars) > _last_true(long_exit, bars)
+        in_short = _last_true(short_entry, bars) > _last_true(short_exit, bars)
+        was_long = np.concatenate(([False], in_long[:-1]))
+        was_short = np.concatenate(([False], in_short[:-1]))
+        
+        idx = np.flatnonzero((long_entry & ~was_long) | (short_entry & ~was_short))
+        if len(idx) == 0:
+            return pd.DataFrame()
         
-        signals = []
-        position = None  # Track current position
+        close, upper, middle, lower = close[idx], upper[idx], middle[idx], lower[idx]
+        # Position inside the bands for all emitted signals at once (0 on zero-width bands)
+        width = upper - lower
+        bb_position = np.divide(close - lower, width, out=np.zeros_like(width), where=width != 0)
+        
+        return pd.DataFrame({
+            'timestamp': ts_arr[idx],
+            'asset': asset,
+            'signal': np.where(long_entry[idx], 'LONG', 'SHORT'),
+            'price': close,
+            'bb_upper': upper,
+            'bb_middle': middle,
+            'bb_lower': lower,
+            'bb_position': bb_position
+        })
+
+
+def _last_true(mask: np.ndarray, bars: np.ndarray) -> np.ndarray:
+    """Index of the most recent True at or before each bar (-1 if none yet)"""
+    return np.maximum.accumulate(np.where(mask, bars, -1))
+
+
+@njit(cache=True)
+def _bbands_loop(close, n, k):
+    """
+    Rolling mean +/- k sample standard deviations in one O(N) pass.
+    Same update rules as pandas .rolling().mean()/.std(): Kahan-compensated
+    running sum for the mean, Welford's update for the variance.
+    """
+    size = len(close)
+    upper = np.full(size, np.nan)
+    middle = np.full(size, np.nan)
+    lower = np.full(size, np.nan)
+    if n < 1 or size < n:
+        return upper, middle, lower
+    
+    nobs = 0
+    total = 0.0
+    comp_add = 0.0
+    comp_remove = 0.0
+    mean = 0.0
+    ssqdm = 0.0
+    var_comp_add = 0.0
+    var_comp_remove = 0.0
+    same_run = 0
+    prev = np.nan
+    for i in range(size):
+        # Drop the bar leaving the window
+        if i >= n:
+            old = close[i - n]
+            if not np.isnan(old):
+                nobs -= 1
+                y = -old - comp_remove
+                t = total + y
+                comp_remove = t - total - y
+                total = t
+                if nobs > 0:
+                    prev_mean = mean - var_comp_remove
+                    y = old - var_comp_remove
+                    t = y - mean
+                    var_comp_remove = t + mean - y
+                    mean = mean - t / nobs
+                    ssqdm = ssqdm - (old - prev_mean) * (old - mean)
+                else:
+                    mean = 0.0
+                    ssqdm = 0.0
         
-        for index, row in df.iterrows():
-            if pd.isna(row['bb_upper']) or pd.isna(row['bb_lower']):
-                continue
-                
-            close_price = row['close']
-            bb_upper = row['bb_upper']
-            bb_lower = row['bb_lower']
-            bb_middle = row['bb_middle']
-            
-            # Buy signal: price touches or crosses below lower band
-            if close_price <= bb_lower and position != 'LONG':
-                signals.append({
-                    'timestamp': index,
-                    'asset': asset,
-                    'signal': 'LONG',
-                    'price': close_price,
-                    'bb_upper': bb_upper,
-                    'bb_middle': bb_middle,
-                    'bb_lower': bb_lower,
-                    'bb_position': (close_price - bb_lower) / (bb_upper - bb_lower) if bb_upper != bb_lower else 0
-                })
-                position = 'LONG'
-            
-            # Sell signal: price touches or crosses above upper band  
-            elif close_price >= bb_upper and position != 'SHORT':
-                signals.append({
-                    'timestamp': index,
-                    'asset': asset,
-                    'signal': 'SHORT',
-                    'price': close_price,
-                    'bb_upper': bb_upper,
-                    'bb_middle': bb_middle,
-                    'bb_lower': bb_lower,
-                    'bb_position': (close_price - bb_lower) / (bb_upper - bb_lower) if bb_upper != bb_lower else 0
-                })
-                position = 'SHORT'
-            
-            # Exit signal: price returns to middle band
-            elif position == 'LONG' and close_price >= bb_middle:
-                # For simplicity, we'll just close the position
-                position = None
-            elif position == 'SHORT' and close_price <= bb_middle:
-                position = None
+        # Add the new bar
+        x = close[i]
+        if not np.isnan(x):
+            nobs += 1
+            same_run = same_run + 1 if x == prev else 1
+            prev = x
+            y = x - comp_add
+            t = total + y
+            comp_add = t - total - y
+            total = t
+            prev_mean = mean - var_comp_add
+            y = x - var_comp_add
+            t = y - mean
+            var_comp_add = t + mean - y
+            mean = mean + t / nobs
+            ssqdm = ssqdm + (x - prev_mean) * (x - mean)
         
-        return pd.DataFrame(signals)
+        if nobs < n:
+            continue
+        if same_run >= nobs:
+            # Flat window: exact mean, zero width
+            mid = prev
+            std = 0.0 if n > 1 else np.nan
+        else:
+            mid = total / nobs
+            std = np.sqrt(ssqdm / (nobs - 1)) if ssqdm > 0 else 0.0
+        middle[i] = mid
+        upper[i] = mid + std * k
+        lower[i] = mid - std * k
+    return upper, middle, lower
@@ -1,7 +1,7 @@
 import pandas as pd
 import numpy as np
 from .base_strategy import BaseStrategy
-from src.api.models.signal_classifier import SignalClassifier
+from src.utils._njit import njit
 
 class RSIStrategy(BaseStrategy):
     """RSI Oversold/Overbought Strategy"""
@@ -18,50 +18,68 @@ class RSIStrategy(BaseStrategy):
         self.name = "RSI Strategy"
     
     def calculate_rsi(self, prices, period=14):
-        """Calculate RSI indicator"""
-        delta = prices.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        return rsi
+        """Calculate RSI indicator (Wilder smoothing)"""
+        rsi = _rsi_loop(prices.to_numpy(dtype=np.float64), int(period))
+        return pd.Series(rsi, index=prices.index)
     
     def generate_signals(self, df: pd.DataFrame, asset: str) -> pd.DataFrame:
         """Generate signals based on RSI levels"""
-        df = df.copy()
-        
         period = self.parameters["rsi_period"]
         oversold = self.parameters["oversold"]
         overbought = self.parameters["overbought"]
         
         # Calculate RSI
-        df['rsi'] = self.calculate_rsi(df['close'], period)
+        close = df['close'].to_numpy(dtype=np.float64)
+        ts_arr = df.index.values  # datetime64 view of the index, no Timestamp boxing
+        rsi = _rsi_loop(close, int(period))
         
-        signals = []
-        position = None
+        # 1 - oversold (LONG), -1 - overbought (SHORT), 0 - neutral or warm-up NaN
+        state = np.where(rsi < oversold, 1, np.where(rsi > overbought, -1, 0))
         
-        for index, row in df.iterrows():
-            rsi = row['rsi']
-            price = row['close']
-            
-            if pd.notna(rsi):
-                if rsi < oversold and position != 'LONG':
-                    signals.append({
-                        'timestamp': index,
-                        'asset': asset,
-                        'signal': 'LONG',
-                        'price': price,
-                        'rsi': rsi
-                    })
-                    position = 'LONG'
-                elif rsi > overbought and position != 'SHORT':
-                    signals.append({
-                        'timestamp': index,
-                        'asset': asset,
-                        'signal': 'SHORT', 
-                        'price': price,
-                        'rsi': rsi
-                    })
-                    position = 'SHORT'
+        # Keep only bars where the zone differs from the last signalled one
+        idx = np.flatnonzero(state != 0)
+        if len(idx) == 0:
+            return pd.DataFrame()
+        nz = state[idx]
+        idx = idx[np.concatenate(([True], nz[1:] != nz[:-1]))]
         
-        return pd.DataFrame(signals)
+        return pd.DataFrame({
+            'timestamp': ts_arr[idx],
+            'asset': asset,
+            'signal': np.where(state[idx] == 1, 'LONG', 'SHORT'),
+            'price': close[idx],
+            'rsi': rsi[idx]
+        })
+
+
+@njit(cache=True)
+def _rsi_loop(close, period):
+    """Wilder RSI: seeded with the simple average of the first `period` moves, then smoothed recursively"""
+    n = len(close)
+    rsi = np.full(n, np.nan)
+    if period < 1 or n <= period:
+        return rsi
+    
+    avg_gain = 0.0
+    avg_loss = 0.0
+    for i in range(1, period + 1):
+        delta = close[i] - close[i - 1]
+        if delta > 0:
+            avg_gain += delta
+        else:
+            avg_loss -= delta
+    avg_gain /= period
+    avg_loss /= period
+    
+    for i in range(period, n):
+        if i > period:
+            delta = close[i] - close[i - 1]
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+            avg_gain = (avg_gain * (period - 1) + gain) / period
+            avg_loss = (avg_loss * (period - 1) + loss) / period
+        if avg_loss > 0:
+            rsi[i] = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+        elif avg_gain > 0:
+            rsi[i] = 100.0
+    return rsi
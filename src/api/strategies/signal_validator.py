@@ -1,9 +1,53 @@
+import logging
+import os
+import threading
+import weakref
 import pandas as pd
 from typing import Dict, List
 from .base_strategy import BaseStrategy
 from ..models.signal_classifier import SignalClassifier
 from ..models.feature_engineer import FeatureEngineer
 
+logger = logging.getLogger(__name__)
+
+VALIDATOR_DEFAULTS = {
+    "base_strategy": "vwap_ib",  # Strategy to validate
+    "confidence_threshold": 0.65,  # Minimum confidence to accept signal
+    "ml_model_type": "random_forest",  # random_forest, xgboost, logistic_regression
+    "fallback_to_original": True,  # Use original signal if ML not trained
+}
+
+# Base strategy signals per price frame: id(df) -> {(frame fingerprint, asset, strategy key): signals}.
+# Entries are dropped together with the frame. Requests run in worker threads, so lookups and
+# generation happen under the lock (each set of base signals is generated once).
+_base_signal_cache: Dict[int, Dict[tuple, pd.DataFrame]] = {}
+_base_signal_lock = threading.Lock()
+
+def _file_mtime(path: str):
+    """Modification time of path, or None if it does not exist"""
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+def _base_signals(base_strategy: BaseStrategy, df: pd.DataFrame, asset: str) -> pd.DataFrame:
+    """Base strategy signals, generated once per (price frame, asset, base strategy parameters)"""
+    try:
+        key = (df.index[0], df.index[-1], len(df), asset,
+               type(base_strategy), tuple(sorted(base_strategy.parameters.items())))
+        hash(key)
+    except (IndexError, TypeError):
+        return base_strategy.generate_signals(df, asset)
+    
+    with _base_signal_lock:
+        frame_cache = _base_signal_cache.get(id(df))
+        if frame_cache is None:
+            frame_cache = _base_signal_cache[id(df)] = {}
+            weakref.finalize(df, _base_signal_cache.pop, id(df), None)
+        if key not in frame_cache:
+            frame_cache[key] = base_strategy.generate_signals(df, asset)
+        return frame_cache[key]
+
 class SignalValidatorStrategy(BaseStrategy):
     """
     ML-powered signal validator that acts as an ensemble filter
@@ -11,18 +55,16 @@ class SignalValidatorStrategy(BaseStrategy):
     """
     
     def __init__(self, parameters: dict = None):
-        default_params = {
-            "base_strategy": "vwap_ib",  # Strategy to validate
-            "confidence_threshold": 0.65,  # Minimum confidence to accept signal
-            "ml_model_type": "random_forest",  # random_forest, xgboost, logistic_regression
-            "fallback_to_original": True,  # Use original signal if ML not trained
-        }
+        default_params = dict(VALIDATOR_DEFAULTS)
         if parameters:
             default_params.update(parameters)
         super().__init__(default_params)
         
         self.signal_classifier = SignalClassifier(self.parameters["ml_model_type"])
         self.base_strategy = None
+        self._model_mtime = None
+        # Registry instances are shared between request threads: one model reload at a time
+        self._model_lock = threading.Lock()
         self.load_base_strategy()
         self.load_trained_model()
     
@@ -31,19 +73,33 @@ class SignalValidatorStrategy(BaseStrategy):
         from . import registry  # Import your strategy registry
         
         try:
+            # Validator-only settings are left out, so every threshold / model type
+            # over the same base parameters shares one base strategy (and its signals)
+            base_parameters = {
+                key: value for key, value in self.parameters.items()
+                if key not in VALIDATOR_DEFAULTS
+            }
             self.base_strategy = registry.get_strategy(
                 self.parameters["base_strategy"],
-                self.parameters
+                base_parameters
             )
         except Exception as e:
             print(f"❌ Error loading base strategy: {e}")
             self.base_strategy = None
     
+    def _model_path(self) -> str:
+        return f"models/signal_classifier_{self.parameters['base_strategy']}.pkl"
+    
     def load_trained_model(self):
         """Load pre-trained signal classifier model"""
-        model_path = f"models/signal_classifier_{self.parameters['base_strategy']}.pkl"
+        model_path = self._model_path()
         try:
-            self.signal_classifier.load_model(model_path)
+            self._model_mtime = _file_mtime(model_path)
+            if self._model_mtime is not None:
+                # load_model caches the unpickled model per (path, mtime)
+                classifier = SignalClassifier(self.parameters["ml_model_type"])
+                classifier.load_model(model_path)
+                self.signal_classifier = classifier
             print(f"✅ Loaded trained signal validator for {self.parameters['base_strategy']}")
         except Exception as e:
             print(f"⚠️  Could not load trained model: {e}")
@@ -52,57 +108,70 @@ class SignalValidatorStrategy(BaseStrategy):
     def generate_signals(self, df: pd.DataFrame, asset: str) -> pd.DataFrame:
         """Generate validated signals using ML confidence"""
         if self.base_strategy is None:
-            print("❌ No base strategy available")
+            logger.warning("No base strategy available")
             return pd.DataFrame()
         
+        # Instances are reused by the registry - pick up a model (re)trained since
+        with self._model_lock:
+            if _file_mtime(self._model_path()) != self._model_mtime:
+                self.load_trained_model()
+            signal_classifier = self.signal_classifier
+        
+        base_name = self.parameters["base_strategy"]
+        threshold = self.parameters["confidence_threshold"]
+        fallback = self.parameters["fallback_to_original"]
+        
         # Get original signals from base strategy
-        original_signals = self.base_strategy.generate_signals(df, asset)
+        original_signals = _base_signals(self.base_strategy, df, asset)
         
         if original_signals.empty:
             return original_signals
         
-        print(f"🔍 Validating {len(original_signals)} signals with ML...")
+        logger.debug("Validating %d signals with ML", len(original_signals))
         
-        # Validate each signal with ML
-        validated_signals = []
-        for _, signal in original_signals.iterrows():
-            confidence = self.signal_classifier.predict_confidence(
-                signal, df, self.parameters["base_strategy"]
-            )
-            
-            signal_dict = signal.to_dict()
-            signal_dict['original_signal'] = signal_dict['signal']
-            signal_dict['ml_confidence'] = confidence
-            signal_dict['ml_validated'] = confidence >= self.parameters["confidence_threshold"]
-            
-            # Only include signals that pass ML validation OR if we're using fallback
-            if (self.parameters["fallback_to_original"] and not self.signal_classifier.is_trained) or \
-               signal_dict['ml_validated']:
-                validated_signals.append(signal_dict)
+        # Validate all signals with ML in one batch
+        confidences = signal_classifier.predict_confidence_batch(
+            original_signals, df, base_name
+        )
+        
+        validated_df = original_signals.copy()
+        validated_df['original_signal'] = validated_df['signal']
+        validated_df['ml_confidence'] = confidences
+        validated_df['ml_validated'] = confidences >= threshold
         
-        validated_df = pd.DataFrame(validated_signals)
+        # Only include signals that pass ML validation OR if we're using fallback
+        if not (fallback and not signal_classifier.is_trained):
+            validated_df = validated_df[validated_df['ml_validated']].reset_index(drop=True)
         
         if not validated_df.empty:
-            accepted = len(validated_df[validated_df['ml_validated']])
+            accepted = int(validated_df['ml_validated'].sum())
             total = len(validated_df)
-            print(f"✅ ML Validation: {accepted}/{total} signals accepted "
-                  f"({accepted/total*100:.1f}% acceptance rate)")
+            logger.debug("ML validation: %d/%d signals accepted (%.1f%% acceptance rate)",
+                         accepted, total, accepted / total * 100)
         
         return validated_df
     
-    def get_validation_stats(self, df: pd.DataFrame, asset: str) -> Dict:
-        """Get statistics about signal validation"""
-        signals = self.generate_signals(df, asset)
+    def get_validation_stats(self, df: pd.DataFrame = None, asset: str = None,
+                             signals: pd.DataFrame = None) -> Dict:
+        """
+        Get statistics about signal validation.
+        Pass the frame returned by generate_signals as `signals` to avoid
+        validating everything a second time.
+        """
+        if signals is None:
+            signals = self.generate_signals(df, asset)
         
         if signals.empty:
             return {}
         
+        total = len(signals)
+        accepted = int(signals['ml_validated'].sum())
         stats = {
-            "total_signals": len(signals),
-            "accepted_signals": len(signals[signals['ml_validated']]),
-            "rejected_signals": len(signals[~signals['ml_validated']]),
+            "total_signals": total,
+            "accepted_signals": accepted,
+            "rejected_signals": total - accepted,
             "average_confidence": signals['ml_confidence'].mean(),
-            "acceptance_rate": len(signals[signals['ml_validated']]) / len(signals),
+            "acceptance_rate": accepted / total,
         }
         
         return stats
@@ -1,6 +1,7 @@
 import pandas as pd
 import numpy as np
 from .base_strategy import BaseStrategy
+from src.utils._njit import njit
 
 class SMACrossover(BaseStrategy):
     """Simple Moving Average Crossover Strategy"""
@@ -17,38 +18,77 @@ class SMACrossover(BaseStrategy):
     
     def generate_signals(self, df: pd.DataFrame, asset: str) -> pd.DataFrame:
         """Generate signals based on SMA crossovers"""
-        df = df.copy()
-        
         fast_period = self.parameters["fast_period"]
         slow_period = self.parameters["slow_period"]
         
         # Calculate SMAs
-        df['sma_fast'] = df['close'].rolling(window=fast_period).mean()
-        df['sma_slow'] = df['close'].rolling(window=slow_period).mean()
+        close = df['close'].to_numpy(dtype=np.float64)
+        ts_arr = df.index.values  # datetime64 view of the index, no Timestamp boxing
+        sma_fast, sma_slow = _dual_sma(close, int(fast_period), int(slow_period))
         
         # Generate signals (1 when fast > slow, 0 otherwise)
-        df['position'] = (df['sma_fast'] > df['sma_slow']).astype(int)
-        df['crossover'] = df['position'].diff()
+        position = (sma_fast > sma_slow).astype(np.int8)
+        crossover = np.diff(position, prepend=position[:1])
+        
+        idx = np.flatnonzero(crossover != 0)
+        if len(idx) == 0:
+            return pd.DataFrame()
+        
+        # Golden cross (1) - BUY, death cross (-1) - SELL
+        return pd.DataFrame({
+            'timestamp': ts_arr[idx],
+            'asset': asset,
+            'signal': np.where(crossover[idx] == 1, 'LONG', 'SHORT'),
+            'price': close[idx],
+            'sma_fast': sma_fast[idx],
+            'sma_slow': sma_slow[idx]
+        })
+
+
+@njit(cache=True)
+def _rolling_mean(close, n):
+    """
+    Simple moving average from a running sum, O(1) per bar.
+    Kahan-compensated add/remove and the flat-window rule as in pandas
+    .rolling(n).mean(), so values (and crossovers) match it exactly.
+    """
+    size = len(close)
+    out = np.full(size, np.nan)
+    if n < 1:
+        return out
+    
+    nobs = 0
+    total = 0.0
+    comp_add = 0.0
+    comp_remove = 0.0
+    same_run = 0
+    prev = np.nan
+    for i in range(size):
+        if i >= n:
+            old = close[i - n]
+            if not np.isnan(old):
+                nobs -= 1
+                y = -old - comp_remove
+                t = total + y
+                comp_remove = t - total - y
+                total = t
         
-        signals = []
-        for index, row in df.iterrows():
-            if row['crossover'] == 1:  # Golden cross - BUY
-                signals.append({
-                    'timestamp': index,
-                    'asset': asset,
-                    'signal': 'LONG',
-                    'price': row['close'],
-                    'sma_fast': row['sma_fast'],
-                    'sma_slow': row['sma_slow']
-                })
-            elif row['crossover'] == -1:  # Death cross - SELL
-                signals.append({
-                    'timestamp': index,
-                    'asset': asset, 
-                    'signal': 'SHORT',
-                    'price': row['close'],
-                    'sma_fast': row['sma_fast'],
-                    'sma_slow': row['sma_slow']
-                })
+        x = close[i]
+        if not np.isnan(x):
+            nobs += 1
+            same_run = same_run + 1 if x == prev else 1
+            prev = x
+            y = x - comp_add
+            t = total + y
+            comp_add = t - total - y
+            total = t
         
-        return pd.DataFrame(signals)
+        if nobs >= n:
+            out[i] = prev if same_run >= nobs else total / nobs
+    return out
+
+
+@njit(cache=True)
+def _dual_sma(close, fast, slow):
+    """Fast and slow SMAs of the same close array"""
+    return _rolling_mean(close, fast), _rolling_mean(close, slow)
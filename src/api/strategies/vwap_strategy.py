@@ -1,5 +1,130 @@
+import logging
+import os
+import threading
+import numpy as np
 import pandas as pd
 from .base_strategy import BaseStrategy
+from src.utils._njit import njit, NUMBA_AVAILABLE
+
+logger = logging.getLogger(__name__)
+
+# Завантажити ML модель з <project root>/models, куди її зберігає train_models
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+_ML_MODEL_PATH = os.path.join(_PROJECT_ROOT, 'models', 'signal_classifier_vwap_ib.pkl')
+
+try:
+    import numexpr as ne
+except ImportError:
+    ne = None
+
+_DAY_NS = 86_400 * 10**9
+
+
+def _time_of_day_ns(t) -> int:
+    """datetime.time -> nanoseconds since midnight"""
+    return ((t.hour * 60 + t.minute) * 60 + t.second) * 10**9 + t.microsecond * 1000
+
+
+def _breakout_mask(close, vwap, ib_high, ib_low) -> np.ndarray:
+    """Candles closing outside the IB range on the same side of VWAP (fused by numexpr when available)"""
+    if ne is not None:
+        return ne.evaluate(
+            "((close > ib_high) & (close > vwap)) | ((close < ib_low) & (close < vwap))",
+            local_dict={"close": close, "vwap": vwap, "ib_high": ib_high, "ib_low": ib_low},
+        )
+    return ((close > ib_high) & (close > vwap)) | ((close < ib_low) & (close < vwap))
+
+
+def _first_breakouts_grouped(sessions, in_ib, in_trading, high, low, close, volume):
+    """
+    First IB breakout of every session with grouped pandas passes. Returns the row
+    positions of the breakouts and the VWAP / IB high / IB low on those rows.
+    """
+    # IB range of each session broadcast back onto its rows (NaN if the session has no IB candles)
+    ib_high = pd.Series(high).where(in_ib).groupby(sessions).transform("max").to_numpy()[in_trading]
+    ib_low = pd.Series(low).where(in_ib).groupby(sessions).transform("min").to_numpy()[in_trading]
+
+    # Only the columns the breakout test needs, restricted to the trading window
+    trading_rows = np.flatnonzero(in_trading)
+    trading_sessions = sessions[in_trading]
+    high, low, close, volume = high[in_trading], low[in_trading], close[in_trading], volume[in_trading]
+
+    # Session-anchored VWAP over the trading window: price*volume and volume summed in one grouped pass
+    typical_price = (high + low + close) / 3
+    cumulative = pd.DataFrame({"pv": typical_price * volume, "volume": volume}).groupby(trading_sessions).cumsum()
+    vwap = (cumulative["pv"] / cumulative["volume"]).to_numpy()
+
+    # First candle per session that breaks out of the IB range on the same side of VWAP
+    hits = np.flatnonzero(_breakout_mask(close, vwap, ib_high, ib_low))
+    _, first = np.unique(trading_sessions[hits], return_index=True)
+
+    rows = hits[first]
+    return trading_rows[rows], vwap[rows], ib_high[rows], ib_low[rows]
+
+
+@njit(cache=True, error_model="numpy")
+def _first_breakouts_scan(sessions, in_ib, in_trading, high, low, close, volume):
+    """
+    Same result as _first_breakouts_grouped in one compiled pass per session, stopping at
+    the first breakout. Needs sorted sessions (each session is one contiguous run of rows).
+    NaN-skipping IB max/min and Kahan-compensated running sums as in pandas, so every value
+    matches the grouped path exactly.
+    """
+    n = len(sessions)
+    rows = np.empty(n, dtype=np.int64)
+    vwaps = np.empty(n, dtype=np.float64)
+    ib_highs = np.empty(n, dtype=np.float64)
+    ib_lows = np.empty(n, dtype=np.float64)
+    count = 0
+
+    start = 0
+    while start < n:
+        # IB range over the whole session
+        end = start
+        ib_high = np.nan
+        ib_low = np.nan
+        while end < n and sessions[end] == sessions[start]:
+            if in_ib[end]:
+                if not np.isnan(high[end]) and (np.isnan(ib_high) or high[end] > ib_high):
+                    ib_high = high[end]
+                if not np.isnan(low[end]) and (np.isnan(ib_low) or low[end] < ib_low):
+                    ib_low = low[end]
+            end += 1
+
+        # Running VWAP over the trading rows until the first breakout
+        pv_sum, pv_comp, volume_sum, volume_comp = 0.0, 0.0, 0.0, 0.0
+        for i in range(start, end):
+            if not in_trading[i]:
+                continue
+            pv = (high[i] + low[i] + close[i]) / 3 * volume[i]
+            cum_pv = np.nan
+            if not np.isnan(pv):
+                y = pv - pv_comp
+                t = pv_sum + y
+                pv_comp = t - pv_sum - y
+                pv_sum = t
+                cum_pv = t
+            cum_volume = np.nan
+            if not np.isnan(volume[i]):
+                y = volume[i] - volume_comp
+                t = volume_sum + y
+                volume_comp = t - volume_sum - y
+                volume_sum = t
+                cum_volume = t
+            vwap = cum_pv / cum_volume
+
+            c = close[i]
+            if (c > ib_high and c > vwap) or (c < ib_low and c < vwap):
+                rows[count] = i
+                vwaps[count] = vwap
+                ib_highs[count] = ib_high
+                ib_lows[count] = ib_low
+                count += 1
+                break
+        start = end
+
+    return rows[:count], vwaps[:count], ib_highs[:count], ib_lows[:count]
+
 
 class VWAPStrategy(BaseStrategy):
     """VWAP + Initial Balance Strategy"""
@@ -15,117 +140,127 @@ class VWAPStrategy(BaseStrategy):
             default_params.update(parameters)
         super().__init__(default_params)
         self.name = "VWAP + Initial Balance"
+        self._parse_times()
+        self._ml_classifier = None
+        self._ml_model_mtime = None
+        # Registry instances are shared between request threads: one model reload at a time
+        self._ml_lock = threading.Lock()
     
-    def generate_signals(self, df: pd.DataFrame, asset: str) -> pd.DataFrame:
-        """Generate trading signals using VWAP + Initial Balance"""
-        IB_START_UTC = pd.to_datetime(self.parameters["ib_start"]).time()
-        IB_END_UTC = pd.to_datetime(self.parameters["ib_end"]).time()
-        SESSION_START_UTC = pd.to_datetime(self.parameters["session_start"]).time()
-        SESSION_END_UTC = pd.to_datetime(self.parameters["session_end"]).time()
-        SESSION_ANCHOR = pd.to_timedelta(self.parameters["session_start"] + ":00")
+    def _parse_times(self):
+        """Parse the session/IB times once instead of on every generate_signals call"""
+        self._ib_start_t = pd.to_datetime(self.parameters["ib_start"]).time()
+        self._ib_end_t = pd.to_datetime(self.parameters["ib_end"]).time()
+        self._session_start_t = pd.to_datetime(self.parameters["session_start"]).time()
+        self._session_end_t = pd.to_datetime(self.parameters["session_end"]).time()
+        self._session_anchor = pd.to_timedelta(self.parameters["session_start"] + ":00")
+    
+    def set_parameters(self, parameters: dict):
+        super().set_parameters(parameters)
+        self._parse_times()
+    
+    def _ml_classifier_for_signals(self):
+        """Classifier for ML confidence, loaded once per instance and reloaded only if the model file changes"""
+        try:
+            mtime = os.path.getmtime(_ML_MODEL_PATH)
+        except OSError:
+            logger.debug("ML model not found at %s", _ML_MODEL_PATH)
+            return None
         
+        with self._ml_lock:
+            if mtime != self._ml_model_mtime:
+                from ..models.signal_classifier import SignalClassifier
+                try:
+                    classifier = SignalClassifier()
+                    classifier.load_model(_ML_MODEL_PATH)
+                except Exception as e:
+                    logger.warning("ML model loading failed: %s", e)
+                    return None
+                self._ml_classifier = classifier
+                self._ml_model_mtime = mtime
+            return self._ml_classifier
+    
+    @staticmethod
+    def _time_mask(tod_ns: np.ndarray, start, end) -> np.ndarray:
+        """Boolean equivalent of between_time(start, end) on a nanoseconds-of-day array"""
+        start_ns, end_ns = _time_of_day_ns(start), _time_of_day_ns(end)
+        if start_ns <= end_ns:
+            return (tod_ns >= start_ns) & (tod_ns <= end_ns)
+        # Window wraps past midnight (e.g. session 22:00 -> 20:00)
+        return (tod_ns >= start_ns) | (tod_ns <= end_ns)
+    
+    def generate_signals(self, df: pd.DataFrame, asset: str) -> pd.DataFrame:
         """Generate trading signals using VWAP + Initial Balance"""
+        IB_START_UTC = self._ib_start_t
+        IB_END_UTC = self._ib_end_t
+        SESSION_START_UTC = self._session_start_t
+        SESSION_END_UTC = self._session_end_t
+        SESSION_ANCHOR = self._session_anchor
         
-        print(f"\n{'='*60}")
-        print(f"🔍 VWAP+IB Strategy Debug for {asset}")
-        print(f"{'='*60}")
-        df = df.copy()
-        df["session_date"] = (df.index - SESSION_ANCHOR).date
-        
+        logger.debug("VWAP+IB strategy for %s", asset)
         if not isinstance(df.index, pd.DatetimeIndex):
-            print("⚠️  Converting index to DatetimeIndex")
+            logger.debug("Converting index to DatetimeIndex")
             if df.index.dtype in ['int64', 'float64']:
                 sample_value = df.index[0]
                 if sample_value > 1e12:
-                    df.index = pd.to_datetime(df.index, unit='ms')
+                    index = pd.to_datetime(df.index, unit='ms')
                 else:
-                    df.index = pd.to_datetime(df.index, unit='s')
+                    index = pd.to_datetime(df.index, unit='s')
             else:
-                df.index = pd.to_datetime(df.index)
+                index = pd.to_datetime(df.index)
+            # Shallow copy so the caller's frame keeps its index
+            df = df.copy(deep=False)
+            df.index = index
         
-        print(f"📊 Data info:")
-        print(f"   Rows: {len(df)}")
-        print(f"   Date range: {df.index[0]} to {df.index[-1]}")
+        if logger.isEnabledFor(logging.DEBUG) and len(df):
+            logger.debug("Rows: %d, date range: %s to %s", len(df), df.index[0], df.index[-1])
 
-        signals = []
-        daily_groups = df.groupby(df["session_date"])
+        # Wall-clock nanoseconds of every row (local time for tz-aware indexes)
+        wall_clock = df.index.tz_localize(None) if df.index.tz is not None else df.index
+        wall_ns = wall_clock.values.astype('datetime64[ns]', copy=False).view('int64')
+        
+        # Session key per row as an int64 day bucket: the date of (timestamp - session start)
+        sessions = (wall_ns - SESSION_ANCHOR.value) // _DAY_NS
+        
+        # Time of day, computed once for all three windows
+        tod_ns = wall_ns % _DAY_NS
+        in_session = self._time_mask(tod_ns, SESSION_START_UTC, SESSION_END_UTC)
+        in_ib = in_session & self._time_mask(tod_ns, IB_START_UTC, IB_END_UTC)
+        in_trading = in_session & self._time_mask(tod_ns, IB_END_UTC, SESSION_END_UTC)
 
-        for day, daily_data in daily_groups:
-            session_data = daily_data.between_time(SESSION_START_UTC, SESSION_END_UTC)
-            if session_data.empty:
-                continue
+        high = df["high"].to_numpy(dtype=np.float64)
+        low = df["low"].to_numpy(dtype=np.float64)
+        close = df["close"].to_numpy(dtype=np.float64)
+        volume = df["volume"].to_numpy(dtype=np.float64)
 
-            ib_data = session_data.between_time(IB_START_UTC, IB_END_UTC)
-            if ib_data.empty:
-                continue
+        # Compiled single pass when numba is installed and sessions are contiguous (sorted index)
+        if NUMBA_AVAILABLE and np.all(sessions[1:] >= sessions[:-1]):
+            rows, vwap, ib_high, ib_low = _first_breakouts_scan(sessions, in_ib, in_trading, high, low, close, volume)
+        else:
+            rows, vwap, ib_high, ib_low = _first_breakouts_grouped(sessions, in_ib, in_trading, high, low, close, volume)
 
-            ib_high = ib_data["high"].max()
-            ib_low = ib_data["low"].min()
+        signals = pd.DataFrame({
+            'timestamp': df.index[rows],
+            'asset': asset,
+            # A breakout above ib_high can only be long (ib_low <= ib_high)
+            'signal': np.where(close[rows] > ib_high, 'LONG', 'SHORT').astype(object),
+            'price': close[rows],
+            'vwap': vwap,
+            'ib_high': ib_high,
+            'ib_low': ib_low
+        })
 
-            trading_candles = session_data.between_time(IB_END_UTC, SESSION_END_UTC).copy()
-            if trading_candles.empty:
-                continue
-                
-            trading_candles["vwap"] = self.calculate_vwap(trading_candles)
-
-            trade_entered = False
-            for index, row in trading_candles.iterrows():
-                if trade_entered:
-                    break
-
-                close_price = row["close"]
-                current_vwap = row["vwap"]
-
-                long_flag = close_price > ib_high and close_price > current_vwap
-                short_flag = close_price < ib_low and close_price < current_vwap
-
-                if long_flag:
-                    signals.append({
-                        'timestamp': index,
-                        'asset': asset,
-                        'signal': 'LONG',
-                        'price': close_price,
-                        'vwap': current_vwap,
-                        'ib_high': ib_high,
-                        'ib_low': ib_low
-                    })
-                    trade_entered = True
-                elif short_flag:
-                    signals.append({
-                        'timestamp': index,
-                        'asset': asset,
-                        'signal': 'SHORT',
-                        'price': close_price,
-                        'vwap': current_vwap,
-                        'ib_high': ib_high,
-                        'ib_low': ib_low
-                    })
-                    trade_entered = True
-        
-        if signals:
-            from ..models.signal_classifier import SignalClassifier
-            import os
-            
-            # Завантажити ML модель
-            # project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')) #Correct, but commented due to error
-            project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', )) #TODO: Fix ml
-            model_path = os.path.join(project_root, 'models', 'signal_classifier_vwap_ib.pkl')
-            if os.path.exists(model_path):
+        if not signals.empty:
+            classifier = self._ml_classifier_for_signals()
+            if classifier is not None:
                 try:
-                    classifier = SignalClassifier()
-                    classifier.load_model(model_path)
+                    # ML confidence for all signals in one batch
+                    signals['ml_confidence'] = classifier.predict_confidence_batch(
+                        signals, df, 'vwap_ib'
+                    )
                     
-                    # Додати ML confidence до кожного сигналу
-                    for signal in signals:
-                        signal['ml_confidence'] = classifier.predict_confidence(
-                            signal, df, 'vwap_ib'
-                        )
-                    
-                    print(f"✅ ML validation added to {len(signals)} signals")
+                    logger.debug("ML validation added to %d signals", len(signals))
                 except Exception as e:
-                    print(f"⚠️  ML model loading failed: {e}")
+                    logger.warning("ML validation failed: %s", e)
                     # Продовжуємо без ML
-            else:
-                print(f"⚠️  ML model not found at {model_path}")
 
-        return pd.DataFrame(signals)
+        return signals
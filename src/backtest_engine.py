@@ -1,231 +1,245 @@
+import weakref
+from dataclasses import replace
+import numpy as np
 import pandas as pd
 from typing import Dict
+from joblib import Parallel, delayed
 from src.api.strategies import registry
+from src._backtest_kernel import EXIT_REASONS, LONG, SHORT, simulate_trades
+from src.config import AssetConfig, get_asset_config
+
+# Risk settings; any of these keys in the backtest parameters overrides the asset's
+# configured value instead of being passed to the strategy
+RISK_KEYS = ("position_size", "stop_loss_pct", "take_profit_pct", "commission", "slippage")
+
+
+def _split_parameters(parameters: dict = None, asset: str = None):
+    """Backtest parameters -> (strategy parameters or None, asset config with risk overrides applied)"""
+    parameters = parameters or {}
+    strategy_params = {k: v for k, v in parameters.items() if k not in RISK_KEYS}
+    config = replace(get_asset_config(asset), **{k: v for k, v in parameters.items() if k in RISK_KEYS})
+    return strategy_params or None, config
+
+
+def _signal_key(strategy_id: str, strategy_params: dict = None):
+    """Parameters that determine a strategy's signals (all of them unless it declares signal_param_keys)"""
+    strategy = registry.get_strategy(strategy_id, strategy_params)
+    keys = getattr(strategy, "signal_param_keys", None)
+    items = (strategy_params or {}).items()
+    return tuple(sorted((k, v) for k, v in items if keys is None or k in keys))
+
+
+def _run_one(strategy_id: str, df: pd.DataFrame, asset: str, parameters: dict, initial_capital: float,
+             engine: "BacktestEngine" = None):
+    """Backtest one parameter combination -> (result, error)"""
+    try:
+        engine = engine or BacktestEngine(initial_capital)
+        return engine.run_backtest(strategy_id, df, asset, parameters), None
+    except Exception as e:
+        return None, str(e)
+
+
+def _run_group(strategy_id: str, df: pd.DataFrame, asset: str, parameter_list: list, initial_capital: float,
+               engine: "BacktestEngine" = None):
+    """
+    Backtest combinations that share their signals on one engine with the signal cache
+    enabled; module-level so worker processes can unpickle it
+    """
+    engine = engine or BacktestEngine(initial_capital)
+    engine._signal_cache = {}
+    try:
+        return [_run_one(strategy_id, df, asset, parameters, initial_capital, engine=engine)
+                for parameters in parameter_list]
+    finally:
+        engine._signal_cache = None
+
 
 class BacktestEngine:
     def __init__(self, initial_capital: float = 10000):
         self.initial_capital = initial_capital
+        # id(df) -> price arrays, dropped when the frame is garbage collected
+        self._ohlc_cache: Dict[int, Dict[str, np.ndarray]] = {}
+        # Signals per (strategy, asset, frame, signal parameters); only enabled for the
+        # duration of a parameter sweep, so strategies with reloadable models stay fresh
+        self._signal_cache: Dict[tuple, pd.DataFrame] = None
+    
+    def _ohlc_arrays(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """Index and price columns of df as NumPy arrays, reused across runs on the same frame"""
+        arrays = self._ohlc_cache.get(id(df))
+        if arrays is None:
+            arrays = self._ohlc_cache[id(df)] = {
+                # int64 nanoseconds, so entry lookups never re-cast the index to a common datetime unit
+                'index_ns': df.index.values.astype('datetime64[ns]', copy=False).view('i8'),
+                'low': df['low'].to_numpy(dtype=np.float64),
+                'high': df['high'].to_numpy(dtype=np.float64),
+                'close': df['close'].to_numpy(dtype=np.float64),
+            }
+            weakref.finalize(df, self._ohlc_cache.pop, id(df), None)
+        return arrays
+    
+    def _signals(self, strategy_id: str, strategy_params: dict, df: pd.DataFrame, asset: str) -> pd.DataFrame:
+        """Strategy signals, reused within a parameter sweep when only non-signal parameters change"""
+        if self._signal_cache is None:
+            return registry.get_strategy(strategy_id, strategy_params).generate_signals(df, asset)
+        
+        try:
+            key = (strategy_id, asset, id(df), _signal_key(strategy_id, strategy_params))
+            hash(key)
+        except TypeError:
+            return registry.get_strategy(strategy_id, strategy_params).generate_signals(df, asset)
+        
+        if key not in self._signal_cache:
+            self._signal_cache[key] = registry.get_strategy(strategy_id, strategy_params).generate_signals(df, asset)
+        return self._signal_cache[key]
     
     def run_backtest(self, strategy_id: str, df: pd.DataFrame, asset: str, parameters: dict = None) -> Dict:
         """Run backtest with specified strategy from registry"""
         try:
-            # Get strategy from registry
-            strategy = registry.get_strategy(strategy_id, parameters)
+            # Configuration: risk overrides are split off, the rest goes to the strategy
+            strategy_params, config = _split_parameters(parameters, asset)
             
             # Generate signals using the strategy
-            signals = strategy.generate_signals(df, asset)
+            signals = self._signals(strategy_id, strategy_params, df, asset)
             
             if signals.empty:
                 return {"error": f"No signals generated for {asset} with strategy {strategy_id}"}
             
-            # Configuration
-            config = {
-                "position_size": 0.1,  # Risk 10% per trade
-                "stop_loss_pct": 0.005,  # 0.5% stop loss
-                "take_profit_pct": 0.01,  # 1% take profit
-                "commission": 0.001,  # 0.1% commission
-                "slippage": 0.0005  # 0.05% slippage
-            }
-            
-            trades = []
-            capital = self.initial_capital
-            
-            for _, signal in signals.iterrows():
-                entry_price = signal['price']
-                entry_time = signal['timestamp']
-                
-                # Skip if we don't have enough capital
-                if capital <= 0:
-                    break
-                
-                # Risk management parameters
-                position_size = config["position_size"]
-                stop_loss_pct = config["stop_loss_pct"]
-                take_profit_pct = config["take_profit_pct"]
-                commission = config["commission"]
-                slippage = config["slippage"]
-                
-                # Calculate stop loss and take profit prices
-                if signal['signal'] == 'LONG':
-                    stop_price = entry_price * (1 - stop_loss_pct)
-                    target_price = entry_price * (1 + take_profit_pct)
-                else:  # SHORT
-                    stop_price = entry_price * (1 + stop_loss_pct)
-                    target_price = entry_price * (1 - take_profit_pct)
-                
-                # Find data after the signal
-                exit_data = df[df.index > entry_time]
-                if exit_data.empty:
-                    continue
-                    
-                exit_reason = "time_exit"
-                exit_price = exit_data.iloc[0]['open']  # Default exit at next open
-                exit_time_idx = exit_data.index[0]
-                
-                # Check for exit conditions in subsequent bars
-                for idx, row in exit_data.iterrows():
-                    current_low = row['low']
-                    current_high = row['high']
-                    current_close = row['close']
-                    
-                    # Check for stop loss hit
-                    if (signal['signal'] == 'LONG' and current_low <= stop_price) or \
-                       (signal['signal'] == 'SHORT' and current_high >= stop_price):
-                        exit_price = stop_price
-                        exit_reason = "stop_loss"
-                        exit_time_idx = idx
-                        break
-                    
-                    # Check for take profit hit
-                    elif (signal['signal'] == 'LONG' and current_high >= target_price) or \
-                         (signal['signal'] == 'SHORT' and current_low <= target_price):
-                        exit_price = target_price
-                        exit_reason = "take_profit"
-                        exit_time_idx = idx
-                        break
-                    
-                    # If we reach the end of data, use the close
-                    elif idx == exit_data.index[-1]:
-                        exit_price = current_close
-                        exit_reason = "end_of_data"
-                        exit_time_idx = idx
-                
-                # Apply slippage
-                if signal['signal'] == 'LONG':
-                    exit_price = exit_price * (1 - slippage)
-                else:  # SHORT
-                    exit_price = exit_price * (1 + slippage)
-                
-                # Calculate P&L with commission
-                if signal['signal'] == 'LONG':
-                    pnl_pct = (exit_price - entry_price) / entry_price
-                else:  # SHORT
-                    pnl_pct = (entry_price - exit_price) / entry_price
-                
-                # Apply commission (both entry and exit)
-                pnl_pct -= commission * 2
-                
-                # Calculate actual P&L amount
-                risk_amount = capital * position_size
-                pnl = risk_amount * pnl_pct
-                capital += pnl
-                
-                # Create trade record
-                trade_data = {
-                    'asset': asset,
-                    'entry_time': entry_time,
-                    'exit_time': exit_time_idx,
-                    'signal': signal['signal'],
-                    'entry_price': float(entry_price),
-                    'exit_price': float(exit_price),
-                    'exit_reason': exit_reason,
-                    'pnl': float(pnl),
-                    'pnl_pct': float(pnl_pct),
-                    'capital': float(capital),
-                    'stop_price': float(stop_price),
-                    'target_price': float(target_price)
-                }
-                
-                # Add ML confidence and validation if available
-                if 'ml_confidence' in signal:
-                    trade_data['ml_confidence'] = float(signal['ml_confidence'])
-                if 'ml_validated' in signal:
-                    trade_data['ml_validated'] = bool(signal['ml_validated'])
-                if 'original_signal' in signal:
-                    trade_data['original_signal'] = signal['original_signal']
-                
-                # Add strategy-specific data
-                strategy_specific_fields = ['vwap', 'ib_high', 'ib_low', 'sma_fast', 'sma_slow', 'rsi', 
-                                          'bb_upper', 'bb_lower', 'bb_middle', 'bb_position']
-                for field in strategy_specific_fields:
-                    if field in signal:
-                        trade_data[field] = float(signal[field]) if isinstance(signal[field], (int, float)) else signal[field]
-                
-                trades.append(trade_data)
-            
-            # Calculate performance metrics
-            performance_metrics = self._calculate_performance_metrics(trades, self.initial_capital)
-            
-            return {
-                'trades': trades,
-                'total_trades': len(trades),
-                'final_capital': capital,
-                'total_return': (capital - self.initial_capital) / self.initial_capital,
-                'strategy_id': strategy_id,
-                'performance_metrics': performance_metrics
-            }
+            return self._simulate(signals, df, asset, config, strategy_id)
             
         except Exception as e:
             return {"error": f"Strategy error: {str(e)}"}
     
-    def _calculate_performance_metrics(self, trades: list, initial_capital: float) -> Dict:
-        """Calculate comprehensive performance metrics"""
-        if not trades:
+    def _simulate(self, signals: pd.DataFrame, df: pd.DataFrame, asset: str, config: AssetConfig,
+                  strategy_id: str) -> Dict:
+        """Simulate trades for pre-generated signals on df with the given risk config"""
+        # Price columns as arrays (cached per frame), indexed by position (index is sorted)
+        arrays = self._ohlc_arrays(df)
+        
+        # Entry times as int64 nanoseconds, kept for the trade durations
+        entry_ns = pd.DatetimeIndex(signals['timestamp']).values.astype('datetime64[ns]', copy=False).view('i8')
+        
+        # Trade simulation runs as one compiled pass over the signal arrays
+        (count, capital, signal_idx, exit_idx, exit_codes, exit_prices, stop_prices,
+         target_prices, pnls, pnl_pcts, capitals) = simulate_trades(
+            entry_ns,
+            np.where(signals['signal'].to_numpy() == 'LONG', LONG, SHORT).astype(np.int8),
+            signals['price'].to_numpy(dtype=np.float64),
+            arrays['index_ns'], arrays['low'], arrays['high'], arrays['close'],
+            float(self.initial_capital),
+            config.position_size, config.stop_loss_pct, config.take_profit_pct,
+            config.commission, config.slippage
+        )
+        
+        # Trade records assembled column-wise from the kernel output and the traded signal rows
+        traded = signals.iloc[signal_idx[:count]].reset_index(drop=True)
+        trades_df = pd.DataFrame({
+            'asset': asset,
+            'entry_time': traded['timestamp'],
+            'exit_time': df.index[exit_idx[:count]],
+            'signal': traded['signal'],
+            'entry_price': traded['price'].astype(float),
+            'exit_price': exit_prices[:count],
+            'exit_reason': np.array(EXIT_REASONS, dtype=object)[exit_codes[:count]],
+            'pnl': pnls[:count],
+            'pnl_pct': pnl_pcts[:count],
+            'capital': capitals[:count],
+            'stop_price': stop_prices[:count],
+            'target_price': target_prices[:count]
+        })
+        
+        # Add ML confidence and validation if available
+        if 'ml_confidence' in traded.columns:
+            trades_df['ml_confidence'] = traded['ml_confidence'].astype(float)
+        if 'ml_validated' in traded.columns:
+            trades_df['ml_validated'] = traded['ml_validated'].astype(bool)
+        if 'original_signal' in traded.columns:
+            trades_df['original_signal'] = traded['original_signal']
+        
+        # Add strategy-specific data (numeric values as floats)
+        for field in ['vwap', 'ib_high', 'ib_low', 'sma_fast', 'sma_slow', 'rsi',
+                      'bb_upper', 'bb_lower', 'bb_middle', 'bb_position']:
+            if field in traded.columns:
+                values = traded[field]
+                trades_df[field] = values.astype(float) if values.dtype.kind in 'biuf' else values
+        
+        # Records zipped from native-typed columns (tolist boxes each column once)
+        columns = trades_df.columns.tolist()
+        trades = [dict(zip(columns, row)) for row in zip(*(trades_df[c].tolist() for c in columns))]
+        
+        # Calculate performance metrics
+        durations_ns = arrays['index_ns'][exit_idx[:count]] - entry_ns[signal_idx[:count]]
+        performance_metrics = self._calculate_performance_metrics(trades_df, self.initial_capital, durations_ns)
+        
+        return {
+            'trades': trades,
+            'total_trades': len(trades),
+            'final_capital': capital,
+            'total_return': (capital - self.initial_capital) / self.initial_capital,
+            'strategy_id': strategy_id,
+            'performance_metrics': performance_metrics
+        }
+    
+    def _calculate_performance_metrics(self, trades: pd.DataFrame, initial_capital: float,
+                                       durations_ns: np.ndarray) -> Dict:
+        """Calculate comprehensive performance metrics from the trades frame and int64 ns trade durations"""
+        if trades.empty:
             return {}
         
-        df = pd.DataFrame(trades)
+        pnl = trades['pnl'].to_numpy()
+        equity_curve = trades['capital'].to_numpy()
         
         # Basic metrics
-        total_return = (df['capital'].iloc[-1] - initial_capital) / initial_capital
-        total_trades = len(df)
+        total_return = (equity_curve[-1] - initial_capital) / initial_capital
+        total_trades = len(pnl)
         
-        # Win/loss metrics
-        winning_trades = df[df['pnl'] > 0]
-        losing_trades = df[df['pnl'] < 0]
+        # Win/loss metrics from one pair of masks over the P&L column
+        wins = pnl[pnl > 0]
+        losses = pnl[pnl < 0]
+        loss_sum = losses.sum()
         
-        win_rate = len(winning_trades) / total_trades if total_trades > 0 else 0
-        avg_win = winning_trades['pnl'].mean() if len(winning_trades) > 0 else 0
-        avg_loss = losing_trades['pnl'].mean() if len(losing_trades) > 0 else 0
-        profit_factor = abs(winning_trades['pnl'].sum() / losing_trades['pnl'].sum()) if len(losing_trades) > 0 and losing_trades['pnl'].sum() != 0 else float('inf')
+        win_rate = len(wins) / total_trades
+        avg_win = wins.mean() if len(wins) > 0 else 0
+        avg_loss = losses.mean() if len(losses) > 0 else 0
+        profit_factor = abs(wins.sum() / loss_sum) if len(losses) > 0 and loss_sum != 0 else float('inf')
         
-        # Risk metrics
-        if len(df) > 0:
-            # Max drawdown
-            equity_curve = df['capital']
-            rolling_max = equity_curve.expanding().max()
-            drawdowns = (equity_curve - rolling_max) / rolling_max
-            max_drawdown = drawdowns.min()
-            
-            # Sharpe ratio (simplified - using daily returns)
-            daily_returns = equity_curve.pct_change().dropna()
-            if len(daily_returns) > 1:
-                sharpe_ratio = daily_returns.mean() / daily_returns.std() * (252 ** 0.5)  # Annualized
-            else:
-                sharpe_ratio = 0
+        # Max drawdown
+        rolling_max = np.maximum.accumulate(equity_curve)
+        drawdowns = (equity_curve - rolling_max) / rolling_max
+        max_drawdown = drawdowns.min()
+        
+        # Sharpe ratio (simplified - using daily returns)
+        daily_returns = equity_curve[1:] / equity_curve[:-1] - 1
+        if len(daily_returns) > 1:
+            sharpe_ratio = daily_returns.mean() / daily_returns.std(ddof=1) * (252 ** 0.5)  # Annualized
         else:
-            max_drawdown = 0
             sharpe_ratio = 0
         
         # Trade duration statistics
-        if len(df) > 0:
-            df['entry_time'] = pd.to_datetime(df['entry_time'])
-            df['exit_time'] = pd.to_datetime(df['exit_time'])
-            df['trade_duration'] = (df['exit_time'] - df['entry_time']).dt.total_seconds() / 3600  # in hours
-            avg_trade_duration = df['trade_duration'].mean()
-        else:
-            avg_trade_duration = 0
+        trade_duration = durations_ns / 1e9 / 3600  # in hours
+        avg_trade_duration = trade_duration.mean()
         
         # ML-specific metrics (if available)
         ml_metrics = {}
-        if 'ml_confidence' in df.columns:
-            ml_trades = df[df['ml_confidence'].notna()]
-            if len(ml_trades) > 0:
-                ml_winning = ml_trades[ml_trades['pnl'] > 0]
-                ml_win_rate = len(ml_winning) / len(ml_trades) if len(ml_trades) > 0 else 0
-                avg_ml_confidence = ml_trades['ml_confidence'].mean()
+        if 'ml_confidence' in trades.columns:
+            confidence = trades['ml_confidence'].to_numpy(dtype=np.float64)
+            has_confidence = ~np.isnan(confidence)
+            ml_trades_count = int(has_confidence.sum())
+            if ml_trades_count > 0:
+                ml_confidence = confidence[has_confidence]
+                ml_pnl = pnl[has_confidence]
                 
                 ml_metrics = {
-                    'ml_trades_count': len(ml_trades),
-                    'ml_win_rate': ml_win_rate,
-                    'avg_ml_confidence': avg_ml_confidence
+                    'ml_trades_count': ml_trades_count,
+                    'ml_win_rate': int((ml_pnl > 0).sum()) / ml_trades_count,
+                    'avg_ml_confidence': ml_confidence.mean()
                 }
                 
                 # High confidence performance (>= 70%)
-                high_conf_trades = ml_trades[ml_trades['ml_confidence'] >= 0.7]
-                if len(high_conf_trades) > 0:
-                    high_conf_wins = high_conf_trades[high_conf_trades['pnl'] > 0]
-                    ml_metrics['high_confidence_win_rate'] = len(high_conf_wins) / len(high_conf_trades)
-                    ml_metrics['high_confidence_trades'] = len(high_conf_trades)
+                high_conf = ml_confidence >= 0.7
+                high_conf_count = int(high_conf.sum())
+                if high_conf_count > 0:
+                    ml_metrics['high_confidence_win_rate'] = int((ml_pnl[high_conf] > 0).sum()) / high_conf_count
+                    ml_metrics['high_confidence_trades'] = high_conf_count
         
         return {
             'total_return': float(total_return),
@@ -246,39 +260,18 @@ class BacktestEngine:
             if signals.empty:
                 return {"error": f"No signals provided for {asset}"}
             
-            # Use the main backtest method but with a dummy strategy
-            # This maintains compatibility with existing code
-            class DummyStrategy:
-                def __init__(self, signals):
-                    self.signals = signals
-                
-                def generate_signals(self, df, asset):
-                    return self.signals
-            
-            dummy_strategy = DummyStrategy(signals)
-            
-            # Temporarily register the dummy strategy
-            original_strategies = registry._strategies.copy()
-            registry._strategies['dummy'] = {
-                'class': lambda params: dummy_strategy,
-                'name': 'Dummy Strategy',
-                'description': 'Temporary strategy for legacy backtest',
-                'parameters': {}
-            }
-            
-            result = self.run_backtest('dummy', price_data, asset)
-            
-            # Restore original strategies
-            registry._strategies = original_strategies
-            
-            return result
+            # Simulate directly; the result keeps the 'dummy' strategy id older callers expect
+            return self._simulate(signals, price_data, asset, get_asset_config(asset), 'dummy')
             
         except Exception as e:
             return {"error": f"Legacy backtest error: {str(e)}"}
     
     def optimize_parameters(self, strategy_id: str, df: pd.DataFrame, asset: str, 
-                          parameter_grid: Dict, initial_capital: float = 10000) -> Dict:
-        """Optimize strategy parameters using grid search"""
+                          parameter_grid: Dict, initial_capital: float = 10000, n_jobs: int = -1) -> Dict:
+        """
+        Optimize strategy parameters using grid search.
+        Combinations are backtested in parallel worker processes (n_jobs as in joblib, 1 = sequential).
+        """
         best_result = None
         best_return = -float('inf')
         best_params = None
@@ -290,35 +283,55 @@ class BacktestEngine:
         param_names = list(parameter_grid.keys())
         param_values = list(parameter_grid.values())
         
-        param_combinations = list(product(*param_values))
+        param_combinations = [dict(zip(param_names, combination)) for combination in product(*param_values)]
+        
+        # Combinations that only differ in risk settings share their signals: each group
+        # runs on one engine that generates the signals once
+        groups: Dict[tuple, list] = {}
+        for i, params in enumerate(param_combinations):
+            try:
+                key = _signal_key(strategy_id, _split_parameters(params)[0])
+                hash(key)
+            except Exception:
+                key = ('ungrouped', i)
+            groups.setdefault(key, []).append(i)
+        
+        # Groups are independent CPU-bound work; outcomes are put back in grid order
+        if n_jobs == 1 or len(groups) <= 1:
+            outcomes = _run_group(strategy_id, df, asset, param_combinations, self.initial_capital, engine=self)
+        else:
+            group_outcomes = Parallel(n_jobs=n_jobs, backend="loky")(
+                delayed(_run_group)(strategy_id, df, asset, [param_combinations[i] for i in indices],
+                                    self.initial_capital)
+                for indices in groups.values()
+            )
+            outcomes = [None] * len(param_combinations)
+            for indices, group in zip(groups.values(), group_outcomes):
+                for i, outcome in zip(indices, group):
+                    outcomes[i] = outcome
         
         results = []
         
-        for i, combination in enumerate(param_combinations):
-            params = dict(zip(param_names, combination))
+        for i, (params, (result, error)) in enumerate(zip(param_combinations, outcomes)):
+            if error is not None:
+                print(f"  ⚠️  Failed with parameters {params}: {error}")
+                continue
             
-            try:
-                result = self.run_backtest(strategy_id, df, asset, params)
+            if "error" not in result and result.get("total_trades", 0) > 0:
+                total_return = result.get("total_return", 0)
+                results.append({
+                    'parameters': params,
+                    'total_return': total_return,
+                    'total_trades': result.get("total_trades", 0),
+                    'win_rate': result.get("performance_metrics", {}).get("win_rate", 0)
+                })
                 
-                if "error" not in result and result.get("total_trades", 0) > 0:
-                    total_return = result.get("total_return", 0)
-                    results.append({
-                        'parameters': params,
-                        'total_return': total_return,
-                        'total_trades': result.get("total_trades", 0),
-                        'win_rate': result.get("performance_metrics", {}).get("win_rate", 0)
-                    })
+                if total_return > best_return:
+                    best_return = total_return
+                    best_result = result
+                    best_params = params
                     
-                    if total_return > best_return:
-                        best_return = total_return
-                        best_result = result
-                        best_params = params
-                        
-                    print(f"  Parameters {i+1}/{len(param_combinations)}: {params} → Return: {total_return:.2%}")
-                    
-            except Exception as e:
-                print(f"  ⚠️  Failed with parameters {params}: {e}")
-                continue
+                print(f"  Parameters {i+1}/{len(param_combinations)}: {params} → Return: {total_return:.2%}")
         
         if best_result is None:
             return {"error": "No successful parameter combinations found"}
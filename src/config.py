@@ -1,3 +1,5 @@
+from dataclasses import dataclass
+
 # Trading strategy configuration for multiple assets
 STRATEGY_CONFIG = {
     "default": {
@@ -8,6 +10,9 @@ STRATEGY_CONFIG = {
         "initial_balance": 10000,
         "commission": 0.001,
         "slippage": 0.0005,
+        "position_size": 0.1,     # Risk 10% per trade
+        "stop_loss_pct": 0.005,   # 0.5% stop loss
+        "take_profit_pct": 0.01,  # 1% take profit
     },
     
     # Asset-specific configurations (optional overrides)
@@ -27,3 +32,32 @@ STRATEGY_CONFIG = {
 
 # List of assets to backtest
 ASSETS = ["XAUUSD", "BTCUSD", "ETHUSD", "SP500"]
+
+
+@dataclass(frozen=True, slots=True)
+class AssetConfig:
+    """Configuration of one asset: the defaults merged with its overrides"""
+    ib_start: str
+    ib_end: str
+    session_start: str
+    session_end: str
+    initial_balance: float
+    commission: float
+    slippage: float
+    position_size: float
+    stop_loss_pct: float
+    take_profit_pct: float
+
+
+DEFAULT_ASSET_CONFIG = AssetConfig(**STRATEGY_CONFIG["default"])
+
+# Resolved once at import
+ASSET_CONFIGS = {
+    asset: AssetConfig(**{**STRATEGY_CONFIG["default"], **STRATEGY_CONFIG.get(asset, {})})
+    for asset in ASSETS
+}
+
+
+def get_asset_config(asset: str) -> AssetConfig:
+    """Configuration for an asset, falling back to the defaults"""
+    return ASSET_CONFIGS.get(asset, DEFAULT_ASSET_CONFIG)
@@ -1,11 +1,177 @@
+import numpy as np
 import pandas as pd
 import os
-from typing import Dict, List, Set
-import glob
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional, Set
+
+try:
+    import pyarrow  # Parquet cache and the fast CSV parser
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pyarrow = None
+    PYARROW_AVAILABLE = False
+
+# Sub-folder of the data folder holding Parquet copies of the parsed CSVs
+PARQUET_CACHE_DIR = ".parquet_cache"
+# Version of the cached frame format: bump whenever _read_csv output changes (parsing, dtypes,
+# index handling), so caches written by older code are treated as misses
+PARQUET_CACHE_VERSION = 2
+
+# Timeframes recognised in CSV file names
+TIMEFRAMES = frozenset({"5m", "15m", "1h", "4h", "1d", "1w"})
+# Substring match anywhere in the name (e.g. "BTC5m.csv"); longest first, so "15m" is not also read as "5m"
+_TIMEFRAME_RE = re.compile("|".join(sorted(map(re.escape, TIMEFRAMES), key=len, reverse=True)))
+_PATH_SEP_RE = re.compile(r'[\\/' + re.escape(os.sep) + ']')
+_UNDERSCORE_RE = re.compile(r'_{2,}')
+
+@lru_cache(maxsize=128)
+def _load_frame(data_folder: str, file_path: str, mtime: float) -> pd.DataFrame:
+    """
+    Parsed frame for one CSV under data_folder, cached per (folder, file, mtime) for every
+    DataLoader (mtime is only part of the key, so edited files reload). The frame is shared by
+    every loader and request, so its column arrays are read-only.
+    """
+    # Parsed frames are cached as Parquet next to the data; CSV is only parsed when it changed
+    df = _read_parquet_cache(data_folder, file_path)
+    if df is None:
+        df = _read_csv(file_path)
+        _write_parquet_cache(data_folder, df, file_path)
+    return _read_only(df)
+
+
+def _read_only(df: pd.DataFrame) -> pd.DataFrame:
+    """df rebuilt from one read-only NumPy array per column (other column types are kept as they are)"""
+    columns = {}
+    for column in df.columns:
+        values = df[column]
+        if isinstance(values.dtype, np.dtype):
+            values = values.to_numpy(copy=True)
+            values.flags.writeable = False
+        columns[column] = values
+    # copy=False keeps the arrays as they are instead of consolidating them into new writable blocks
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+
+def _read_csv(file_path: str) -> pd.DataFrame:
+    """Parse one CSV into a time-indexed, sorted, de-duplicated frame"""
+    # Read the CSV once (multithreaded Arrow parser when available) and pick the time column from it
+    df = pd.read_csv(file_path, engine="pyarrow") if PYARROW_AVAILABLE else pd.read_csv(file_path)
+    
+    # Determine time column
+    time_column = None
+    if 'datetime' in df.columns:
+        time_column = 'datetime'
+    elif 'timestamp' in df.columns:
+        time_column = 'timestamp'
+    elif 'time' in df.columns:
+        time_column = 'time'
+    elif 'date' in df.columns:
+        time_column = 'date'
+    
+    if time_column:
+        # Check if timestamp is numeric (Unix timestamp)
+        if pd.api.types.is_numeric_dtype(df[time_column]):
+            # Determine if milliseconds or seconds from the typical magnitude of the leading
+            # values (one stray first row no longer decides the unit for the whole file)
+            values = df[time_column].to_numpy()
+            sample_value = np.median(values[:1024]) if len(values) else 0
+            
+            if sample_value > 1e12:  # Bigger than 1 trillion = milliseconds
+                print(f"   Converting Unix timestamp (ms) to datetime")
+                df[time_column] = pd.to_datetime(values, unit='ms')
+            elif sample_value > 1e9:  # Bigger than 1 billion = seconds
+                print(f"   Converting Unix timestamp (s) to datetime")
+                df[time_column] = pd.to_datetime(values, unit='s')
+            else:
+                # Might be already datetime or other format
+                df[time_column] = pd.to_datetime(df[time_column])
+        else:
+            # String datetime format
+            df[time_column] = pd.to_datetime(df[time_column])
+        
+        # Set as index
+        df.set_index(time_column, inplace=True)
+        
+        # Sort by index
+        df.sort_index(inplace=True)
+        
+        # Remove duplicate indices: on the sorted int64 view a duplicate equals its predecessor,
+        # so one vectorized comparison replaces Index.duplicated's hash table
+        index_ns = df.index.values.view('i8')
+        if len(index_ns) > 1 and not (index_ns[1:] != index_ns[:-1]).all():
+            df = df.iloc[np.concatenate(([True], index_ns[1:] != index_ns[:-1]))]
+        
+    else:
+        # No time column found, just load as-is
+        print(f"⚠️  No time column found, loading without datetime index")
+    
+    return _downcast(df)
+
+
+def _downcast(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Shrink OHLCV columns where it loses nothing: integer volume to the smallest
+    unsigned type, prices to float32 only if every value survives the round trip
+    (typical crypto prices do not, and stay float64).
+    """
+    if 'volume' in df.columns and pd.api.types.is_integer_dtype(df['volume']) and (df['volume'] >= 0).all():
+        df['volume'] = pd.to_numeric(df['volume'], downcast='unsigned')
+    
+    for col in ['open', 'high', 'low', 'close']:
+        if col in df.columns and df[col].dtype == np.float64:
+            values = df[col].to_numpy()
+            narrow = values.astype(np.float32)
+            if np.array_equal(narrow.astype(np.float64), values, equal_nan=True):
+                df[col] = narrow
+    return df
+
+
+def _parquet_cache_path(data_folder: str, file_path: str) -> str:
+    """
+    Cache file for a CSV: <data_folder>/.parquet_cache/<format tag>/<relative path>.parquet.
+    The tag holds PARQUET_CACHE_VERSION and the pandas/pyarrow versions, so a cache written
+    by other parsing code or another build is never read back.
+    """
+    rel_path = os.path.relpath(file_path, data_folder)
+    tag = f"v{PARQUET_CACHE_VERSION}-pandas{pd.__version__}-pyarrow{pyarrow.__version__}"
+    return os.path.join(data_folder, PARQUET_CACHE_DIR, tag, os.path.splitext(rel_path)[0] + ".parquet")
+
+
+def _read_parquet_cache(data_folder: str, file_path: str):
+    """Cached frame for file_path if it is at least as new as the CSV, else None"""
+    if not PYARROW_AVAILABLE:
+        return None
+    cache_path = _parquet_cache_path(data_folder, file_path)
+    try:
+        if os.path.getmtime(cache_path) < os.path.getmtime(file_path):
+            return None
+        return pd.read_parquet(cache_path)
+    except OSError:
+        return None
+    except Exception as e:
+        print(f"⚠️  Ignoring unreadable cache {cache_path}: {e}")
+        return None
+
+
+def _write_parquet_cache(data_folder: str, df: pd.DataFrame, file_path: str):
+    """Persist a parsed frame for the next load (best effort - read-only folders just skip it)"""
+    if not PYARROW_AVAILABLE:
+        return
+    cache_path = _parquet_cache_path(data_folder, file_path)
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        df.to_parquet(cache_path, compression="zstd")
+    except Exception as e:
+        print(f"⚠️  Could not write cache {cache_path}: {e}")
+
 
 class DataLoader:
     def __init__(self, data_folder: str = None):
-        self._all_files = []  # Cached list of all files
+        # Exchanges / timeframes found in the data folder, filled by the first get_available_* call
+        self._exchanges = None
+        self._timeframes = None
         # If no data folder specified, try to find it automatically
         if data_folder is None:
             # First, try relative to current directory (for running from root)
@@ -31,99 +197,92 @@ class DataLoader:
             print(f"💡 Available directories: {os.listdir('.')}")
             return assets_data
         
-        # Support both .csv files and subdirectories
-        csv_pattern = os.path.join(self.data_folder, "**", "*.csv")
-        csv_files = glob.glob(csv_pattern, recursive=True)
-        
-        # Also check root data folder
-        root_csv_files = glob.glob(os.path.join(self.data_folder, "*.csv"))
-        csv_files.extend(root_csv_files)
-        
-        for file_path in set(csv_files):  # Remove duplicates
-            try:
-                # Extract asset name from FULL PATH, not just filename
-                # Convert path like: data_many/Coinbase/Futures/BTC/1d.csv
-                # Into asset name: Coinbase_Futures_BTC_1d
-                
-                rel_path = os.path.relpath(file_path, self.data_folder)
-                
-                # Remove .csv extension
-                rel_path_no_ext = rel_path.replace('.csv', '')
-                
-                # Replace path separators with underscores
-                asset_name = rel_path_no_ext.replace(os.sep, '_').replace('/', '_').replace('\\', '_')
-                
-                # Clean up any double underscores
-                while '__' in asset_name:
-                    asset_name = asset_name.replace('__', '_')
-                
-                print(f"📊 Processing: {rel_path} → {asset_name}")
-
-                # Read CSV - first check what columns exist
-                sample_df = pd.read_csv(file_path, nrows=1)
-                
-                # Determine time column
-                time_column = None
-                if 'datetime' in sample_df.columns:
-                    time_column = 'datetime'
-                elif 'timestamp' in sample_df.columns:
-                    time_column = 'timestamp'
-                elif 'time' in sample_df.columns:
-                    time_column = 'time'
-                elif 'date' in sample_df.columns:
-                    time_column = 'date'
-                
-                if time_column:
-                    # Read the full CSV
-                    df = pd.read_csv(file_path)
-                    
-                    # Check if timestamp is numeric (Unix timestamp)
-                    if pd.api.types.is_numeric_dtype(df[time_column]):
-                        # Determine if milliseconds or seconds
-                        sample_value = df[time_column].iloc[0]
-                        
-                        if sample_value > 1e12:  # Bigger than 1 trillion = milliseconds
-                            print(f"   Converting Unix timestamp (ms) to datetime")
-                            df[time_column] = pd.to_datetime(df[time_column], unit='ms')
-                        elif sample_value > 1e9:  # Bigger than 1 billion = seconds
-                            print(f"   Converting Unix timestamp (s) to datetime")
-                            df[time_column] = pd.to_datetime(df[time_column], unit='s')
-                        else:
-                            # Might be already datetime or other format
-                            df[time_column] = pd.to_datetime(df[time_column])
-                    else:
-                        # String datetime format
-                        df[time_column] = pd.to_datetime(df[time_column])
-                    
-                    # Set as index
-                    df.set_index(time_column, inplace=True)
-                    
-                    # Sort by index
-                    df.sort_index(inplace=True)
-                    
-                    # Remove duplicate indices
-                    df = df[~df.index.duplicated(keep='first')]
+        asset_files = self._asset_files()
+        
+        # Files are independent: parse them concurrently (the Arrow CSV/Parquet readers release
+        # the GIL) and report in discovery order as each one completes
+        with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) + 4)) as executor:
+            futures = {asset_name: executor.submit(self._load_path, file_path)
+                       for asset_name, file_path in asset_files.items()}
+            
+            for asset_name, future in futures.items():
+                file_path = asset_files[asset_name]
+                try:
+                    rel_path = os.path.relpath(file_path, self.data_folder)
+                    print(f"📊 Processing: {rel_path} → {asset_name}")
+
+                    df = future.result()
+
+                    assets_data[asset_name] = df
+                    print(f"✅ Loaded {asset_name} with {len(df)} rows")
+                    if isinstance(df.index, pd.DatetimeIndex) and len(df) > 0:
+                        print(f"   Date range: {df.index[0]} to {df.index[-1]}")
                     
-                else:
-                    # No time column found, just load as-is
-                    print(f"⚠️  No time column found, loading without datetime index")
-                    df = pd.read_csv(file_path)
-
-                assets_data[asset_name] = df
-                print(f"✅ Loaded {asset_name} with {len(df)} rows")
-                if isinstance(df.index, pd.DatetimeIndex) and len(df) > 0:
-                    print(f"   Date range: {df.index[0]} to {df.index[-1]}")
-                
-            except Exception as e:
-                print(f"❌ Error loading {file_path}: {e}")
-                import traceback
-                traceback.print_exc()
+                except Exception as e:
+                    print(f"❌ Error loading {file_path}: {e}")
+                    import traceback
+                    traceback.print_exc()
         
         print(f"\n📋 Total assets loaded: {len(assets_data)}")
         print(f"📋 Asset names: {list(assets_data.keys())}")
         
         return assets_data
     
+    def load_asset(self, asset_name: str) -> Optional[pd.DataFrame]:
+        """Load a single asset by name (as returned by load_all_assets), or None if there is no such file"""
+        file_path = self._asset_files().get(asset_name)
+        if file_path is None:
+            return None
+        return self._load_path(file_path)
+    
+    def _load_path(self, file_path: str) -> pd.DataFrame:
+        """
+        Parsed frame for file_path, from the in-memory cache unless the file changed. Each caller
+        gets its own shallow copy over the shared read-only column arrays, so adding or replacing
+        columns stays local and in-place writes to values raise.
+        """
+        # Frames are cached at module level (not on the loader), so loaders created per request
+        # (dashboards, chart endpoints) reuse frames already parsed without keeping each other alive
+        frame = _load_frame(os.path.abspath(self.data_folder), os.path.abspath(file_path), os.path.getmtime(file_path))
+        return frame.copy(deep=False)
+    
+    def _asset_files(self) -> Dict[str, str]:
+        """Asset name -> CSV path for every CSV under the data folder"""
+        asset_files = {}
+        for file_path in self._csv_files():
+            # Extract asset name from FULL PATH, not just filename
+            # Convert path like: data_many/Coinbase/Futures/BTC/1d.csv
+            # Into asset name: Coinbase_Futures_BTC_1d
+            
+            rel_path = os.path.relpath(file_path, self.data_folder)
+            
+            # Remove .csv extension
+            rel_path_no_ext = rel_path.replace('.csv', '')
+            
+            # Replace path separators with underscores, collapsing runs of underscores
+            asset_name = _UNDERSCORE_RE.sub('_', _PATH_SEP_RE.sub('_', rel_path_no_ext))
+            
+            asset_files[asset_name] = file_path
+        return asset_files
+    
+    def _csv_files(self) -> List[str]:
+        """Every CSV in the data folder and its subdirectories, from a single directory walk"""
+        if not os.path.isdir(self.data_folder):
+            return []
+        return list(self._scan_csvs(self.data_folder))
+    
+    def _scan_csvs(self, path: str):
+        """Yield CSV paths under path with os.scandir, reusing each entry's cached type info"""
+        with os.scandir(path) as it:
+            for entry in it:
+                # Hidden files and folders (e.g. the Parquet cache) are skipped, as glob did
+                if entry.name.startswith('.'):
+                    continue
+                if entry.is_dir():
+                    yield from self._scan_csvs(entry.path)
+                elif entry.name.endswith('.csv') and entry.is_file():
+                    yield entry.path
+    
     def validate_data(self, df: pd.DataFrame, asset: str) -> bool:
         """Basic data validation"""
         required_columns = ['open', 'high', 'low', 'close', 'volume']
@@ -137,25 +296,30 @@ class DataLoader:
         
         return True
 
+    def _index_tree(self):
+        """Exchanges and timeframes of every CSV, collected in one walk and cached on the loader"""
+        exchanges = set()
+        timeframes = set()
+        
+        for file_path in self._csv_files():
+            rel_path = os.path.relpath(file_path, self.data_folder)
+            if os.sep in rel_path:
+                exchanges.add(rel_path.split(os.sep, 1)[0])
+            
+            timeframes.update(_TIMEFRAME_RE.findall(os.path.basename(file_path)))
+        
+        self._exchanges = sorted(exchanges)
+        self._timeframes = sorted(timeframes)
+    
     def get_available_exchanges(self) -> List[str]:
         """Get list of unique exchanges in the data folder"""
         if not os.path.exists(self.data_folder):
             print(f"❌ Data folder not found: {self.data_folder}")
             return []
         
-        if not self._all_files:
-            self._all_files = glob.glob(os.path.join(self.data_folder, "**/*.csv"), recursive=True)
-        
-        exchanges = set()
-        
-        for file_path in self._all_files:
-            rel_path = os.path.relpath(file_path, self.data_folder)
-            parts = rel_path.split(os.sep)
-            
-            if len(parts) > 1:
-                exchanges.add(parts[0])
-        
-        return sorted(list(exchanges))
+        if self._exchanges is None:
+            self._index_tree()
+        return list(self._exchanges)
     
     def get_available_timeframes(self) -> List[str]:
         """Get list of unique timeframes in the data folder"""
@@ -163,16 +327,6 @@ class DataLoader:
             print(f"❌ Data folder not found: {self.data_folder}")
             return []
         
-        if not self._all_files:
-            self._all_files = glob.glob(os.path.join(self.data_folder, "**/*.csv"), recursive=True)
-        
-        timeframes = set()
-        
-        for file_path in self._all_files:
-            file_name = os.path.basename(file_path)
-            
-            for tf in ["5m", "15m", "1h", "4h", "1d", "1w"]:
-                if tf in file_name:
-                    timeframes.add(tf)
-        
-        return sorted(list(timeframes))
\ No newline at end of file
+        if self._timeframes is None:
+            self._index_tree()
+        return list(self._timeframes)
@@ -1,33 +1,42 @@
+import numpy as np
 import pandas as pd
+from src.utils._njit import njit
 
 def analyze_trades_detailed(trades_df):
     """Detailed analysis of trading performance"""
     if trades_df.empty:
         return {}
     
-    df = trades_df.copy()
+    # Only the columns the metrics need, as arrays (no frame copy)
+    total_trades = len(trades_df)
+    pnl = trades_df['pnl'].to_numpy(dtype=np.float64)
+    capital = trades_df['capital'].to_numpy(dtype=np.float64)
+    entry_times = trades_df['entry_time'].to_numpy(dtype='datetime64[ns]')
+    exit_times = trades_df['exit_time'].to_numpy(dtype='datetime64[ns]')
     
-    # Basic metrics
-    total_trades = len(df)
-    winning_trades = df[df['pnl'] > 0]
-    losing_trades = df[df['pnl'] < 0]
+    # Basic metrics: count and sum of losing / flat / winning trades in one bincount pass
+    # (bucket 0 = loss, 1 = flat or NaN, 2 = win)
+    buckets = (np.sign(np.nan_to_num(pnl)) + 1).astype(np.intp)
+    n_loss, _, n_win = np.bincount(buckets, minlength=3).tolist()
+    sum_loss, _, sum_win = np.bincount(buckets, weights=pnl, minlength=3)
     
-    win_rate = len(winning_trades) / total_trades
-    avg_win = winning_trades['pnl'].mean() if not winning_trades.empty else 0
-    avg_loss = losing_trades['pnl'].mean() if not losing_trades.empty else 0
-    profit_factor = abs(winning_trades['pnl'].sum() / losing_trades['pnl'].sum()) if not losing_trades.empty else float('inf')
+    win_rate = n_win / total_trades
+    avg_win = sum_win / n_win if n_win > 0 else 0
+    avg_loss = sum_loss / n_loss if n_loss > 0 else 0
+    profit_factor = abs(sum_win / sum_loss) if n_loss > 0 else float('inf')
     
     # Risk-adjusted metrics
     expectancy = (win_rate * avg_win) + ((1 - win_rate) * avg_loss)
     risk_reward_ratio = abs(avg_win / avg_loss) if avg_loss != 0 else float('inf')
     
-    # Drawdown analysis
-    df['cumulative_max'] = df['capital'].cummax()
-    df['drawdown'] = (df['cumulative_max'] - df['capital']) / df['cumulative_max']
-    max_drawdown = df['drawdown'].max()
+    # Drawdown analysis (single pass over the capital column)
+    max_drawdown = _max_drawdown(capital)
     
-    # Exit reason analysis
-    exit_reasons = df['exit_reason'].value_counts()
+    # Exit reason analysis: factorize once, count the integer codes, most common first
+    reason_codes, reasons = pd.factorize(trades_df['exit_reason'])
+    reason_counts = np.bincount(reason_codes[reason_codes >= 0], minlength=len(reasons))
+    order = np.argsort(-reason_counts, kind='stable')
+    exit_reasons = dict(zip(reasons[order].tolist(), reason_counts[order].tolist()))
     
     return {
         'total_trades': total_trades,
@@ -38,13 +47,26 @@ def analyze_trades_detailed(trades_df):
         'expectancy': expectancy,
         'risk_reward_ratio': risk_reward_ratio,
         'max_drawdown': max_drawdown,
-        'total_return': (df['capital'].iloc[-1] - df['capital'].iloc[0]) / df['capital'].iloc[0],
-        'best_trade': df['pnl'].max(),
-        'worst_trade': df['pnl'].min(),
-        'exit_reasons': exit_reasons.to_dict(),
-        'avg_trade_duration': (df['exit_time'] - df['entry_time']).mean(),
+        'total_return': (capital[-1] - capital[0]) / capital[0],
+        'best_trade': trades_df['pnl'].max(),
+        'worst_trade': trades_df['pnl'].min(),
+        'exit_reasons': exit_reasons,
+        'avg_trade_duration': pd.Timedelta((exit_times - entry_times).mean()),
     }
 
+@njit(cache=True)
+def _max_drawdown(capital):
+    """Largest fall from a running peak, as a fraction of that peak"""
+    peak = capital[0]
+    max_dd = 0.0
+    for i in range(1, len(capital)):
+        if capital[i] > peak:
+            peak = capital[i]
+        drawdown = (peak - capital[i]) / peak
+        if drawdown > max_dd:
+            max_dd = drawdown
+    return max_dd
+
 def print_detailed_report(metrics, asset):
     """Print a detailed performance report"""
     print(f"\n📊 DETAILED ANALYSIS - {asset}")
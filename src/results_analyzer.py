@@ -1,6 +1,11 @@
+import numpy as np
 import pandas as pd
 from typing import Dict
 
+# Columns of the compare_assets frame, in output order
+COMPARISON_COLUMNS = ('total_trades', 'total_return', 'total_return_pct', 'win_rate', 'avg_win',
+                      'avg_loss', 'profit_factor', 'largest_win', 'largest_loss', 'asset')
+
 class ResultsAnalyzer:
     @staticmethod
     def calculate_metrics(trades: list) -> Dict:
@@ -23,15 +28,21 @@ class ResultsAnalyzer:
                 'error': "No profit/loss data available"
             }
         
-        # Basic metrics
+        # Basic metrics: winners and losers from one pair of masks over the P&L column
+        pnl = df['pnl'].to_numpy(dtype=np.float64)
+        is_win = pnl > 0
+        wins = pnl[is_win]
+        losses = pnl[pnl < 0]
+        
         total_return = df['pnl'].sum()
-        win_rate = (df['pnl'] > 0).mean()
-        avg_win = df[df['pnl'] > 0]['pnl'].mean() if not df[df['pnl'] > 0].empty else 0
-        avg_loss = df[df['pnl'] < 0]['pnl'].mean() if not df[df['pnl'] < 0].empty else 0
+        win_rate = is_win.mean()
+        avg_win = wins.mean() if len(wins) > 0 else 0
+        avg_loss = losses.mean() if len(losses) > 0 else 0
         
         # Calculate profit factor safely
-        if not df[df['pnl'] < 0].empty and df[df['pnl'] < 0]['pnl'].sum() != 0:
-            profit_factor = abs(df[df['pnl'] > 0]['pnl'].sum() / df[df['pnl'] < 0]['pnl'].sum())
+        loss_sum = losses.sum()
+        if len(losses) > 0 and loss_sum != 0:
+            profit_factor = abs(wins.sum() / loss_sum)
         else:
             profit_factor = float('inf')
         
@@ -61,7 +72,9 @@ class ResultsAnalyzer:
         
         print(f"ResultsAnalyzer.compare_assets called with {len(results)} assets")
         
-        comparison = []
+        # Metrics are appended column by column and the frame is built once at the end
+        comparison = {column: [] for column in COMPARISON_COLUMNS}
+        n_rows = 0
         for asset, result in results.items():
             try:
                 print(f"Processing asset {asset} for comparison")
@@ -79,7 +92,13 @@ class ResultsAnalyzer:
 
                     metrics = ResultsAnalyzer.calculate_metrics(result['trades'])
                     metrics['asset'] = asset
-                    comparison.append(metrics)
+                    for column, values in comparison.items():
+                        values.append(metrics.get(column, np.nan))
+                    # Extra keys (e.g. 'error') get a column padded with NaN for earlier rows
+                    for key, value in metrics.items():
+                        if key not in comparison:
+                            comparison[key] = [np.nan] * n_rows + [value]
+                    n_rows += 1
                     print(f"Added metrics for {asset}: {metrics}")
                 else:
                     print(f"Skipping asset {asset}: No trades found or empty trades list")
@@ -89,10 +108,10 @@ class ResultsAnalyzer:
                 # Continue with other assets instead of failing entirely
                 continue
         
-        if not comparison:
+        if not n_rows:
             print("Warning: No assets produced valid metrics for comparison")
             # Return empty DataFrame with expected columns
             return pd.DataFrame(columns=['asset', 'total_trades', 'total_return', 'win_rate'])
             
-        print(f"Creating DataFrame from {len(comparison)} assets")
+        print(f"Creating DataFrame from {n_rows} assets")
         return pd.DataFrame(comparison)
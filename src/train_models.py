@@ -1,6 +1,7 @@
 import pandas as pd
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 
 # Add the current directory to Python path
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -19,21 +20,25 @@ def ensure_models_directory():
     os.makedirs(models_dir, exist_ok=True)
     return models_dir
 
-def train_signal_validator(strategy_id: str, asset: str):
-    """Train signal validator for a specific strategy with error handling"""
+def train_signal_validator(strategy_id: str, asset: str, assets_data: dict = None) -> bool:
+    """
+    Train signal validator for a specific strategy with error handling.
+    Pass assets_data to reuse already loaded data; returns True if a model was saved.
+    """
     print(f"🎯 Training Signal Validator for {strategy_id} on {asset}")
     
-    # Load data - let DataLoader auto-detect the path
-    loader = DataLoader()
-    assets_data = loader.load_all_assets()
+    if assets_data is None:
+        # Load data - let DataLoader auto-detect the path
+        loader = DataLoader()
+        assets_data = loader.load_all_assets()
     
     if not assets_data:
         print(f"❌ No data loaded. Please check your data folder.")
-        return
+        return False
     
     if asset not in assets_data:
         print(f"❌ Asset {asset} not found. Available assets: {list(assets_data.keys())}")
-        return
+        return False
     
     data = assets_data[asset]
     
@@ -44,7 +49,7 @@ def train_signal_validator(strategy_id: str, asset: str):
         
         if historical_signals.empty:
             print(f"❌ No historical signals generated for {strategy_id}")
-            return
+            return False
         
         print(f"📊 Generated {len(historical_signals)} historical signals")
         
@@ -63,32 +68,58 @@ def train_signal_validator(strategy_id: str, asset: str):
             classifier.save_model(model_path)
             
             print(f"✅ Signal validator training completed for {strategy_id}")
+            return True
             
         except Exception as e:
             print(f"❌ Error during ML training for {strategy_id}: {e}")
             print("💡 This might be due to insufficient data or feature calculation issues")
-            return
+            return False
         
     except Exception as e:
         print(f"❌ Error generating signals for {strategy_id}: {e}")
         import traceback
         traceback.print_exc()
+        return False
 
-def train_all_strategies():
-    """Train signal validators for all major strategies"""
+def train_all_strategies(asset: str = None, max_workers: int = None):
+    """
+    Train signal validators for all major strategies on one asset. Without an asset the
+    alphabetically first asset name is used, so the choice does not depend on the order
+    the filesystem lists the data files in. Data is loaded once and the strategies train
+    in parallel worker processes.
+    """
     print("🚀 Starting ML Model Training for All Strategies...")
     print("=" * 60)
     
     strategies_to_train = ["vwap_ib", "sma_crossover", "rsi_oversold"]
     
+    assets_data = DataLoader().load_all_assets()
+    if not assets_data:
+        print(f"❌ No data loaded. Please check your data folder.")
+        return
+    if asset is None:
+        asset = min(assets_data)
+        print(f"💡 No asset given, training on {asset}")
+    
+    if asset not in assets_data:
+        print(f"❌ Asset {asset} not found. Available assets: {list(assets_data.keys())}")
+        return
+    
+    # Workers only need the one asset's frame
+    training_data = {asset: assets_data[asset]}
+    
+    with ProcessPoolExecutor(max_workers=max_workers or len(strategies_to_train)) as pool:
+        outcomes = list(pool.map(train_signal_validator, strategies_to_train,
+                                 [asset] * len(strategies_to_train),
+                                 [training_data] * len(strategies_to_train)))
+    
     successful = 0
-    for strategy_id in strategies_to_train:
-        try:
-            train_signal_validator(strategy_id)
+    for strategy_id, trained in zip(strategies_to_train, outcomes):
+        if trained:
             successful += 1
-        except Exception as e:
-            print(f"❌ Failed to train {strategy_id}: {e}")
-        print("-" * 40)
+        else:
+            print(f"❌ Failed to train {strategy_id}")
+    print("-" * 40)
     
     print(f"🎉 Training completed! {successful}/{len(strategies_to_train)} strategies trained successfully!")
 
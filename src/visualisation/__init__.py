@@ -1,6 +1,24 @@
 # Visualization package
-from .strategy_dashboard import StrategyDashboard
-from .confidence_analysis import ConfidenceAnalysis
-from .signal_timeline import SignalTimeline
+# Classes are imported on first access (PEP 562), so importing a single submodule
+# does not load plotly and every dashboard with it
+import importlib
 
 __all__ = ["StrategyDashboard", "ConfidenceAnalysis", "SignalTimeline"]
+
+_LAZY_CLASSES = {
+    "StrategyDashboard": "strategy_dashboard",
+    "ConfidenceAnalysis": "confidence_analysis",
+    "SignalTimeline": "signal_timeline",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_CLASSES:
+        module = importlib.import_module(f".{_LAZY_CLASSES[name]}", __name__)
+        value = globals()[name] = getattr(module, name)
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,125 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+import pandas as pd
+
+from backtest_engine import BacktestEngine
+from data_loader import DataLoader
+
+# Approximate 5-min bars per day (288 = 24 hours * 12 five-minute bars)
+BARS_PER_DAY = 288
+
+# Backtest results and signals keyed by (strategy, asset, initial capital, model version, last bar, bar count)
+BACKTEST_CACHE_SIZE = 128
+_backtest_cache: "OrderedDict[tuple, Tuple[Dict[str, Any], pd.DataFrame]]" = OrderedDict()
+_backtest_cache_lock = threading.Lock()
+
+# Folders the strategies load ML models from: <project root>/models, where training saves them
+# (VWAPStrategy); the validators' cwd-relative "models" folder is added per call
+_SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_DIRS = (os.path.join(os.path.dirname(_SRC_DIR), "models"),)
+
+# Bumped by clear_backtest_cache, so caches keyed on model_version() drop their entries too
+_model_generation = 0
+
+
+def model_version() -> tuple:
+    """
+    Identity of the saved ML models: the clear generation plus every model file and its mtime.
+    Changes when a model is (re)trained, in this process or another one.
+    """
+    stamps = []
+    for directory in {*MODEL_DIRS, os.path.abspath("models")}:
+        try:
+            with os.scandir(directory) as it:
+                stamps.extend((entry.path, entry.stat().st_mtime_ns)
+                              for entry in it if entry.name.endswith(".pkl"))
+        except OSError:
+            continue
+    return (_model_generation, tuple(sorted(stamps)))
+
+
+def load_window(data_loader: DataLoader, asset: str, days: int) -> pd.DataFrame:
+    """Price data of one asset for the last `days` days (the whole history if it is shorter)"""
+    # Only the requested asset's file is parsed (or taken from the shared frame cache)
+    data = data_loader.load_asset(asset)
+    if data is None:
+        raise ValueError(f"Asset {asset} not found")
+    
+    # Slice only when the window is shorter than the history
+    bars = int(days * BARS_PER_DAY)
+    if 0 < bars < len(data):
+        data = data.iloc[-bars:]
+    return data
+
+
+def window_key(data: pd.DataFrame) -> tuple:
+    """Identity of a data window: its last bar and bar count"""
+    return (data.index[-1] if len(data) else None, len(data))
+
+
+def window_etag(data: pd.DataFrame, *parts) -> str:
+    """HTTP ETag for a chart built from parts (kind, strategy, asset, days) over a data window and the current models"""
+    raw = "|".join(map(str, parts + (model_version(),) + window_key(data)))
+    return '"' + hashlib.sha1(raw.encode()).hexdigest() + '"'
+
+
+def run_backtest_cached(strategy_id: str, data: pd.DataFrame, asset: str,
+                        initial_capital: float = 10000) -> Tuple[Dict[str, Any], pd.DataFrame]:
+    """
+    (backtest result, strategy signals) for a data window, shared by the chart endpoints.
+    Signals are generated once and reused by the backtest; callers must not mutate the results.
+    """
+    key = (strategy_id, asset, initial_capital, model_version()) + window_key(data)
+    
+    with _backtest_cache_lock:
+        cached = _backtest_cache.get(key)
+        if cached is not None:
+            _backtest_cache.move_to_end(key)
+            return cached
+    
+    engine = BacktestEngine(initial_capital)
+    engine._signal_cache = {}
+    signals = engine._signals(strategy_id, None, data, asset)
+    result = engine.run_backtest(strategy_id, data, asset)
+    
+    with _backtest_cache_lock:
+        _backtest_cache[key] = (result, signals)
+        if len(_backtest_cache) > BACKTEST_CACHE_SIZE:
+            _backtest_cache.popitem(last=False)
+    return result, signals
+
+
+def clear_backtest_cache() -> None:
+    """Drop all cached backtests and start a new model generation (e.g. after strategies or models change)"""
+    global _model_generation
+    with _backtest_cache_lock:
+        _backtest_cache.clear()
+        _model_generation += 1
+
+
+def _bulk_worker(chart_class: type, method: str, strategy_id: str, asset: str, days: int) -> Dict[str, Any]:
+    """Worker entry point for generate_bulk; a failed asset comes back as {"error": ...}"""
+    try:
+        return getattr(chart_class(), method)(strategy_id, asset, days)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def generate_bulk(chart_class: type, method: str, strategy_id: str, assets: List[str], days: int,
+                  max_workers: int = None) -> Dict[str, Dict[str, Any]]:
+    """
+    chart_class().method(strategy_id, asset, days) for several assets in parallel worker
+    processes, keyed by asset. Each worker loads only the assets it is given.
+    """
+    if not assets:
+        return {}
+    workers = max_workers or min(len(assets), os.cpu_count() or 1)
+    n = len(assets)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(_bulk_worker, [chart_class] * n, [method] * n, [strategy_id] * n, assets, [days] * n)
+        return dict(zip(assets, results))
@@ -0,0 +1,29 @@
+from datetime import date, datetime
+
+import numpy as np
+import orjson
+import pandas as pd
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    """Fallback for objects orjson does not encode natively"""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, pd.DataFrame):
+        return obj.to_dict(orient="records")
+    if isinstance(obj, (pd.Series, pd.Index, np.ndarray)):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if hasattr(obj, "to_plotly_json"):
+        return obj.to_plotly_json()
+    return str(obj)
+
+
+def to_json_bytes(obj) -> bytes:
+    """Serialize dashboard/chart payloads straight to JSON bytes (NaN/inf become null)"""
+    return orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS)
@@ -1,7 +1,7 @@
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
-import plotly.express as px
-from typing import Dict, Any
+from typing import Dict, Any, List
 import sys
 import os
 
@@ -9,29 +9,22 @@ import os
 # sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from api.strategies import registry
-from backtest_engine import BacktestEngine
 from data_loader import DataLoader
+from ._backtest_cache import generate_bulk, load_window, run_backtest_cached, window_etag
+from ._serialization import to_json_bytes
+
 
 class ConfidenceAnalysis:
     def __init__(self):
-        self.backtester = BacktestEngine()
         self.data_loader = DataLoader()
     
     def generate_analysis(self, strategy_id: str, asset: str, days: int) -> Dict[str, Any]:
         """Generate ML confidence analysis"""
         
-        # Load data
-        assets_data = self.data_loader.load_all_assets()
-        if asset not in assets_data:
-            raise ValueError(f"Asset {asset} not found")
-        
-        data = assets_data[asset]
-        if days > 0:
-            data = data.tail(min(len(data), int(days * 288)))
+        data = load_window(self.data_loader, asset, days)
         
-        # Run backtest
-        self.backtester.initial_capital = 10000
-        result = self.backtester.run_backtest(strategy_id, data, asset)
+        # Run backtest (shared with the signal timeline for the same data window)
+        result, _ = run_backtest_cached(strategy_id, data, asset, 10000)
         
         if "error" in result:
             raise ValueError(f"Backtest error: {result['error']}")
@@ -61,31 +54,51 @@ class ConfidenceAnalysis:
             "period_days": days
         }
     
+    def generate_analysis_bulk(self, strategy_id: str, assets: List[str], days: int,
+                               max_workers: int = None) -> Dict[str, Dict[str, Any]]:
+        """Generate the analysis for several assets in parallel worker processes, keyed by asset"""
+        return generate_bulk(ConfidenceAnalysis, "generate_analysis", strategy_id, assets, days, max_workers)
+    
+    def etag(self, strategy_id: str, asset: str, days: int) -> str:
+        """ETag of the confidence response, which only changes when the data window advances or a model is retrained"""
+        return window_etag(load_window(self.data_loader, asset, days), "confidence", strategy_id, asset, days)
+    
+    def generate_analysis_json(self, strategy_id: str, asset: str, days: int) -> bytes:
+        """Generate the analysis as JSON bytes in a single orjson pass (figure arrays stay numpy)"""
+        return to_json_bytes(self.generate_analysis(strategy_id, asset, days))
+    
     def _create_confidence_charts(self, trades_df: pd.DataFrame, strategy_id: str):
         """Create confidence analysis charts"""
         charts = {}
         
-        # 1. Confidence vs PnL Scatter Plot
-        trades_df = trades_df.copy()
-        trades_df["is_win"] = trades_df["pnl"] > 0
-        trades_df["pnl_pct"] = trades_df["pnl_pct"] * 100
-        trades_df["ml_confidence_pct"] = trades_df["ml_confidence"] * 100
-        
-        scatter_fig = px.scatter(
-            trades_df,
-            x="ml_confidence_pct",
-            y="pnl_pct",
-            color="is_win",
-            color_discrete_map={True: "green", False: "red"},
-            title="ML Confidence vs Trade Performance",
-            labels={
-                "ml_confidence_pct": "ML Confidence Score (%)",
-                "pnl_pct": "Trade P&L (%)",
-                "is_win": "Winning Trade"
-            },
-            hover_data=["entry_time", "exit_reason"],
-            size_max=10
-        )
+        # Plain arrays for the traces; float32 is plenty for percentages on screen
+        # and halves the numbers written into the figure JSON
+        confidence_pct = (trades_df["ml_confidence"].to_numpy(dtype=np.float64) * 100).astype(np.float32)
+        pnl_pct = (trades_df["pnl_pct"].to_numpy(dtype=np.float64) * 100).astype(np.float32)
+        is_win = trades_df["pnl"].to_numpy() > 0
+        hover = np.column_stack([trades_df["entry_time"].astype(str).to_numpy(),
+                                 trades_df["exit_reason"].to_numpy()])
+        # One trace per outcome, as the legend shows them (empty outcomes are left out)
+        outcomes = [(win, str(win), color, is_win == win)
+                    for win, color in ((False, "red"), (True, "green"))
+                    if np.any(is_win == win)]
+        
+        # 1. Confidence vs PnL Scatter Plot (WebGL markers)
+        scatter_fig = go.Figure([
+            go.Scattergl(
+                x=confidence_pct[mask],
+                y=pnl_pct[mask],
+                mode="markers",
+                name=name,
+                legendgroup=name,
+                marker=dict(color=color),
+                customdata=hover[mask],
+                hovertemplate=(f"Winning Trade={win}<br>ML Confidence Score (%)=%{{x}}<br>"
+                               "Trade P&L (%)=%{y}<br>entry_time=%{customdata[0]}<br>"
+                               "exit_reason=%{customdata[1]}<extra></extra>")
+            )
+            for win, name, color, mask in outcomes
+        ])
         
         # Add reference lines
         scatter_fig.add_hline(y=0, line_dash="dash", line_color="black")
@@ -93,46 +106,60 @@ class ConfidenceAnalysis:
                              annotation_text="70% Confidence")
         
         scatter_fig.update_layout(
+            title="ML Confidence vs Trade Performance",
             height=500,
             xaxis_range=[0, 100],
+            xaxis_title="ML Confidence Score (%)",
+            yaxis_title="Trade P&L (%)",
+            legend_title_text="Winning Trade",
             showlegend=True
         )
         
         charts["confidence_scatter"] = scatter_fig.to_dict()
         
         # 2. Confidence Distribution by Win/Loss
-        hist_fig = px.histogram(
-            trades_df,
-            x="ml_confidence_pct",
-            color="is_win",
-            nbins=20,
+        hist_fig = go.Figure([
+            go.Histogram(
+                x=confidence_pct[mask],
+                nbinsx=20,
+                bingroup="x",
+                name=name,
+                legendgroup=name,
+                marker=dict(color=color),
+                hovertemplate=f"is_win={win}<br>ML Confidence Score (%)=%{{x}}<br>count=%{{y}}<extra></extra>"
+            )
+            for win, name, color, mask in outcomes
+        ])
+        hist_fig.update_layout(
             title="Confidence Distribution by Trade Outcome",
-            labels={
-                "ml_confidence_pct": "ML Confidence Score (%)", 
-                "count": "Number of Trades"
-            },
-            color_discrete_map={True: "green", False: "red"}
+            height=400,
+            bargap=0.1,
+            barmode="relative",
+            xaxis_title="ML Confidence Score (%)",
+            yaxis_title="count",
+            legend_title_text="is_win",
+            showlegend=True
         )
-        hist_fig.update_layout(height=400, bargap=0.1, showlegend=True)
         charts["confidence_histogram"] = hist_fig.to_dict()
         
         # 3. Performance by Confidence Buckets
         bucket_metrics = self._calculate_confidence_buckets(trades_df)
         if bucket_metrics:
-            bucket_df = pd.DataFrame(bucket_metrics)
+            win_rates = np.array([bucket["win_rate"] for bucket in bucket_metrics])
             
             # Win rate by confidence bucket
-            winrate_fig = px.bar(
-                bucket_df,
-                x="confidence_range",
-                y="win_rate",
-                title="Win Rate by Confidence Level",
-                color="win_rate",
-                color_continuous_scale="RdYlGn",
-                text="win_rate"
-            )
-            winrate_fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+            winrate_fig = go.Figure(go.Bar(
+                x=[bucket["confidence_range"] for bucket in bucket_metrics],
+                y=win_rates,
+                text=win_rates,
+                texttemplate='%{text:.1f}%',
+                textposition='outside',
+                marker=dict(color=win_rates, colorscale="RdYlGn",
+                            colorbar=dict(title=dict(text="win_rate"))),
+                hovertemplate="confidence_range=%{x}<br>win_rate=%{marker.color}<extra></extra>"
+            ))
             winrate_fig.update_layout(
+                title="Win Rate by Confidence Level",
                 height=400, 
                 showlegend=False,
                 xaxis_title="Confidence Range",
@@ -146,72 +173,73 @@ class ConfidenceAnalysis:
         """Calculate confidence performance metrics"""
         metrics = {}
         
+        pnl = trades_df["pnl"].to_numpy(dtype=np.float64)
+        confidence = trades_df["ml_confidence"].to_numpy(dtype=np.float64)
+        
+        # One mask per condition, shared by every group below (NaN confidence is in neither group)
+        win = pnl > 0
+        groups = {
+            "high_confidence": confidence >= 0.7,
+            "low_confidence": confidence < 0.7,
+        }
+        
         # Overall performance
-        total_trades = len(trades_df)
-        winning_trades = trades_df[trades_df["pnl"] > 0]
-        losing_trades = trades_df[trades_df["pnl"] < 0]
+        total_trades = len(pnl)
+        winning_trades = np.count_nonzero(win)
         
         metrics["overall"] = {
             "total_trades": total_trades,
-            "winning_trades": len(winning_trades),
-            "losing_trades": len(losing_trades),
-            "win_rate": len(winning_trades) / total_trades * 100 if total_trades > 0 else 0,
+            "winning_trades": winning_trades,
+            "losing_trades": np.count_nonzero(pnl < 0),
+            "win_rate": winning_trades / total_trades * 100 if total_trades > 0 else 0,
             "avg_pnl": trades_df["pnl"].mean(),
             "avg_confidence": trades_df["ml_confidence"].mean() * 100
         }
         
-        # High confidence performance (>= 70%)
-        high_conf_trades = trades_df[trades_df["ml_confidence"] >= 0.7]
-        if len(high_conf_trades) > 0:
-            high_conf_wins = high_conf_trades[high_conf_trades["pnl"] > 0]
-            metrics["high_confidence"] = {
-                "trades_count": len(high_conf_trades),
-                "win_rate": len(high_conf_wins) / len(high_conf_trades) * 100 if len(high_conf_trades) > 0 else 0,
-                "avg_pnl": high_conf_trades["pnl"].mean(),
-                "avg_confidence": high_conf_trades["ml_confidence"].mean() * 100
-            }
-        
-        # Low confidence performance (< 70%)
-        low_conf_trades = trades_df[trades_df["ml_confidence"] < 0.7]
-        if len(low_conf_trades) > 0:
-            low_conf_wins = low_conf_trades[low_conf_trades["pnl"] > 0]
-            metrics["low_confidence"] = {
-                "trades_count": len(low_conf_trades),
-                "win_rate": len(low_conf_wins) / len(low_conf_trades) * 100 if len(low_conf_trades) > 0 else 0,
-                "avg_pnl": low_conf_trades["pnl"].mean(),
-                "avg_confidence": low_conf_trades["ml_confidence"].mean() * 100
-            }
+        # High (>= 70%) and low (< 70%) confidence performance
+        for name, mask in groups.items():
+            trades_count = np.count_nonzero(mask)
+            if trades_count > 0:
+                metrics[name] = {
+                    "trades_count": trades_count,
+                    "win_rate": np.count_nonzero(win & mask) / trades_count * 100,
+                    "avg_pnl": pnl[mask].mean(),
+                    "avg_confidence": confidence[mask].mean() * 100
+                }
         
         return metrics
     
     def _calculate_confidence_buckets(self, trades_df: pd.DataFrame):
         """Calculate performance metrics for confidence buckets"""
-        buckets = [
-            (0.0, 0.3, "0-30%"),
-            (0.3, 0.5, "30-50%"), 
-            (0.5, 0.7, "50-70%"),
-            (0.7, 0.85, "70-85%"),
-            (0.85, 1.0, "85-100%")
-        ]
+        edges = np.array([0.0, 0.3, 0.5, 0.7, 0.85, 1.0])
+        labels = ["0-30%", "30-50%", "50-70%", "70-85%", "85-100%"]
+        
+        confidence = trades_df["ml_confidence"].to_numpy(dtype=np.float64)
+        pnl = trades_df["pnl"].to_numpy(dtype=np.float64)
+        
+        # Bucket index per trade (edges[i] <= confidence < edges[i + 1]); anything else,
+        # including NaN and 1.0, lands outside 0..4 and is dropped
+        codes = np.searchsorted(edges, confidence, side="right") - 1
+        in_bucket = (codes >= 0) & (codes < len(labels))
+        codes, confidence, pnl = codes[in_bucket], confidence[in_bucket], pnl[in_bucket]
+        
+        # Count, wins and sums for all buckets in one bincount each
+        counts = np.bincount(codes, minlength=len(labels))
+        wins = np.bincount(codes, weights=pnl > 0, minlength=len(labels))
+        pnl_sums = np.bincount(codes, weights=pnl, minlength=len(labels))
+        confidence_sums = np.bincount(codes, weights=confidence, minlength=len(labels))
         
         bucket_metrics = []
         
-        for low, high, label in buckets:
-            bucket_trades = trades_df[
-                (trades_df["ml_confidence"] >= low) & 
-                (trades_df["ml_confidence"] < high)
-            ]
-            
-            if len(bucket_trades) > 0:
-                winning_trades = bucket_trades[bucket_trades["pnl"] > 0]
-                
-                bucket_metrics.append({
-                    "confidence_range": label,
-                    "trades_count": len(bucket_trades),
-                    "win_rate": len(winning_trades) / len(bucket_trades) * 100,
-                    "avg_pnl": bucket_trades["pnl"].mean(),
-                    "avg_confidence": bucket_trades["ml_confidence"].mean() * 100
-                })
+        for i in np.flatnonzero(counts).tolist():
+            count = int(counts[i])
+            bucket_metrics.append({
+                "confidence_range": labels[i],
+                "trades_count": count,
+                "win_rate": wins[i] / count * 100,
+                "avg_pnl": pnl_sums[i] / count,
+                "avg_confidence": confidence_sums[i] / count * 100
+            })
         
         return bucket_metrics
     def _generate_basic_analysis(self, trades_df: pd.DataFrame, strategy_id: str, asset: str, days: int) -> Dict[str, Any]:
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
@@ -10,32 +11,42 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from api.strategies import registry
 from data_loader import DataLoader
-from backtest_engine import BacktestEngine
+from ._backtest_cache import generate_bulk, load_window, run_backtest_cached, window_etag
+from ._serialization import to_json_bytes
+
+# Windows longer than CANDLE_LIMIT bars are drawn as about CANDLE_TARGET merged candles
+CANDLE_LIMIT = 5000
+CANDLE_TARGET = 2500
+
+
+def _candles(data: pd.DataFrame):
+    """
+    Candlestick x/open/high/low/close arrays, merging runs of consecutive bars into one
+    OHLC candle when the window is longer than CANDLE_LIMIT (NaN highs/lows are skipped)
+    """
+    opens, highs = data['open'].to_numpy(), data['high'].to_numpy()
+    lows, closes = data['low'].to_numpy(), data['close'].to_numpy()
+    if len(data) <= CANDLE_LIMIT:
+        return data.index, opens, highs, lows, closes
+    
+    bucket = -(-len(data) // CANDLE_TARGET)
+    starts = np.arange(0, len(data), bucket)
+    ends = np.minimum(starts + bucket, len(data)) - 1
+    return (data.index[starts], opens[starts], np.fmax.reduceat(highs, starts),
+            np.fmin.reduceat(lows, starts), closes[ends])
+
 
 class SignalTimeline:
     def __init__(self):
         self.data_loader = DataLoader()
-        self.backtester = BacktestEngine()
     
     def generate_timeline(self, strategy_id: str, asset: str, days: int) -> Dict[str, Any]:
         """Generate price chart with ML-validated signals"""
         
-        # Load data
-        assets_data = self.data_loader.load_all_assets()
-        if asset not in assets_data:
-            raise ValueError(f"Asset {asset} not found")
-        
-        data = assets_data[asset]
-        if days > 0:
-            data = data.tail(min(len(data), int(days * 288)))
+        data = load_window(self.data_loader, asset, days)
         
-        # Get strategy and generate signals
-        strategy = registry.get_strategy(strategy_id)
-        signals = strategy.generate_signals(data, asset)
-        
-        # Run backtest to get trade results
-        self.backtester.initial_capital = 10000
-        backtest_result = self.backtester.run_backtest(strategy_id, data, asset)
+        # Strategy signals and the backtest on them, generated once per data window
+        backtest_result, signals = run_backtest_cached(strategy_id, data, asset, 10000)
         trades = backtest_result.get("trades", []) if "error" not in backtest_result else []
         
         # Generate timeline chart
@@ -54,6 +65,19 @@ class SignalTimeline:
             "total_trades": len(trades)
         }
     
+    def generate_timeline_bulk(self, strategy_id: str, assets: List[str], days: int,
+                               max_workers: int = None) -> Dict[str, Dict[str, Any]]:
+        """Generate the timeline for several assets in parallel worker processes, keyed by asset"""
+        return generate_bulk(SignalTimeline, "generate_timeline", strategy_id, assets, days, max_workers)
+    
+    def etag(self, strategy_id: str, asset: str, days: int) -> str:
+        """ETag of the timeline response, which only changes when the data window advances or a model is retrained"""
+        return window_etag(load_window(self.data_loader, asset, days), "timeline", strategy_id, asset, days)
+    
+    def generate_timeline_json(self, strategy_id: str, asset: str, days: int) -> bytes:
+        """Generate the timeline as JSON bytes in a single orjson pass (figure arrays stay numpy)"""
+        return to_json_bytes(self.generate_timeline(strategy_id, asset, days))
+    
     def _create_timeline_chart(self, data: pd.DataFrame, signals: pd.DataFrame, trades: List, strategy_id: str, asset: str):
         """Create price timeline with signals overlay"""
         
@@ -67,14 +91,15 @@ class SignalTimeline:
             row_heights=[0.7, 0.3]
         )
         
-        # 1. Price candlestick chart
+        # 1. Price candlestick chart (long windows merged down to about CANDLE_TARGET candles)
+        candle_x, candle_open, candle_high, candle_low, candle_close = _candles(data)
         fig.add_trace(
             go.Candlestick(
-                x=data.index,
-                open=data['open'],
-                high=data['high'],
-                low=data['low'],
-                close=data['close'],
+                x=candle_x,
+                open=candle_open,
+                high=candle_high,
+                low=candle_low,
+                close=candle_close,
                 name="Price"
             ),
             row=1, col=1
@@ -82,16 +107,22 @@ class SignalTimeline:
         
         # 2. Add signals to price chart
         if not signals.empty:
-            # Separate buy and sell signals
-            buy_signals = signals[signals['signal'] == 'LONG']
-            sell_signals = signals[signals['signal'] == 'SHORT']
+            # Separate buy and sell signals in one partition (the signals frame is shared, so it is not modified)
+            sides = dict(list(signals.groupby('signal', sort=False)))
+            buy_signals = sides.get('LONG', signals.iloc[:0])
+            sell_signals = sides.get('SHORT', signals.iloc[:0])
+            
+            def confidence(side_signals):
+                if 'ml_confidence' in side_signals.columns:
+                    return side_signals['ml_confidence'].to_numpy()
+                return np.zeros(len(side_signals))
             
             # Add buy signals
             if not buy_signals.empty:
                 fig.add_trace(
                     go.Scatter(
                         x=buy_signals['timestamp'],
-                        y=buy_signals['price'],
+                        y=buy_signals['price'].to_numpy(),
                         mode='markers+text',
                         marker=dict(
                             symbol='triangle-up',
@@ -106,7 +137,7 @@ class SignalTimeline:
                             "Price: %{y:.2f}<br>" +
                             "Confidence: %{customdata:.1%}<extra></extra>"
                         ),
-                        customdata=buy_signals.get('ml_confidence', [0] * len(buy_signals))
+                        customdata=confidence(buy_signals)
                     ),
                     row=1, col=1
                 )
@@ -116,7 +147,7 @@ class SignalTimeline:
                 fig.add_trace(
                     go.Scatter(
                         x=sell_signals['timestamp'],
-                        y=sell_signals['price'],
+                        y=sell_signals['price'].to_numpy(),
                         mode='markers+text',
                         marker=dict(
                             symbol='triangle-down',
@@ -131,47 +162,35 @@ class SignalTimeline:
                             "Price: %{y:.2f}<br>" +
                             "Confidence: %{customdata:.1%}<extra></extra>"
                         ),
-                        customdata=sell_signals.get('ml_confidence', [0] * len(sell_signals))
+                        customdata=confidence(sell_signals)
                     ),
                     row=1, col=1
                 )
         
         # 3. Add actual trade entries from backtest
         if trades:
-            trade_entries = []
-            trade_exits = []
-            
-            for trade in trades:
-                trade_entries.append({
-                    'time': trade['entry_time'],
-                    'price': trade['entry_price'],
-                    'type': trade['signal']
-                })
-                trade_exits.append({
-                    'time': trade['exit_time'], 
-                    'price': trade['exit_price'],
-                    'type': trade['signal']
-                })
+            # Only the two entry columns, straight from the trade records
+            entry_df = pd.DataFrame(trades, columns=['entry_time', 'entry_price'])
+            # WebGL markers once there are too many trades for SVG
+            marker_trace = go.Scattergl if len(entry_df) > 1000 else go.Scatter
             
             # Add trade entry markers
-            entry_df = pd.DataFrame(trade_entries)
-            if not entry_df.empty:
-                fig.add_trace(
-                    go.Scatter(
-                        x=entry_df['time'],
-                        y=entry_df['price'],
-                        mode='markers',
-                        marker=dict(
-                            symbol='circle',
-                            size=8,
-                            color='blue',
-                            line=dict(width=2, color='white')
-                        ),
-                        name='Trade Entry',
-                        hovertemplate="<b>TRADE ENTRY</b><br>Time: %{x}<br>Price: %{y:.2f}<extra></extra>"
+            fig.add_trace(
+                marker_trace(
+                    x=entry_df['entry_time'],
+                    y=entry_df['entry_price'],
+                    mode='markers',
+                    marker=dict(
+                        symbol='circle',
+                        size=8,
+                        color='blue',
+                        line=dict(width=2, color='white')
                     ),
-                    row=1, col=1
-                )
+                    name='Trade Entry',
+                    hovertemplate="<b>TRADE ENTRY</b><br>Time: %{x}<br>Price: %{y:.2f}<extra></extra>"
+                ),
+                row=1, col=1
+            )
         
         # 4. ML Confidence timeline (if available)
         if not signals.empty and 'ml_confidence' in signals.columns:
@@ -225,17 +244,19 @@ class SignalTimeline:
         
         if not signals.empty:
             stats["total_signals"] = len(signals)
-            stats["buy_signals"] = len(signals[signals['signal'] == 'LONG'])
-            stats["sell_signals"] = len(signals[signals['signal'] == 'SHORT'])
+            side_counts = signals['signal'].value_counts()
+            stats["buy_signals"] = int(side_counts.get('LONG', 0))
+            stats["sell_signals"] = int(side_counts.get('SHORT', 0))
             
             if 'ml_confidence' in signals.columns:
                 stats["avg_confidence"] = signals['ml_confidence'].mean() * 100
-                stats["high_confidence_signals"] = len(signals[signals['ml_confidence'] >= 0.7])
+                stats["high_confidence_signals"] = np.count_nonzero(signals['ml_confidence'].to_numpy() >= 0.7)
         
         if trades:
             stats["total_trades"] = len(trades)
-            winning_trades = [t for t in trades if t['pnl'] > 0]
-            stats["winning_trades"] = len(winning_trades)
-            stats["win_rate"] = len(winning_trades) / len(trades) * 100 if trades else 0
+            pnl = np.fromiter((trade['pnl'] for trade in trades), dtype=np.float64, count=len(trades))
+            winning_trades = np.count_nonzero(pnl > 0)
+            stats["winning_trades"] = winning_trades
+            stats["win_rate"] = winning_trades / len(trades) * 100
         
         return stats
@@ -1,35 +1,72 @@
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
-import plotly.express as px
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Set
 import sys
 import os
 
 # Add src to path for imports
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
+import threading
+from collections import OrderedDict
 from api.strategies import registry
-from backtest_engine import BacktestEngine
 from data_loader import DataLoader
+from ._backtest_cache import load_window, model_version, run_backtest_cached
+from ._serialization import to_json_bytes
+
+# Serialized dashboards keyed by (asset, days, initial_capital, model version, last bar, bar count)
+DASHBOARD_CACHE_SIZE = 32
+_dashboard_cache: "OrderedDict[tuple, bytes]" = OrderedDict()
+_dashboard_cache_lock = threading.Lock()
+
+# Equity curve line colors per strategy
+STRATEGY_COLORS = {
+    "vwap_ib": "blue",
+    "vwap_ml_validated": "green",
+    "sma_crossover": "orange",
+    "rsi_oversold": "red"
+}
+
+# Layout shared by the strategy comparison bar charts
+BASE_BAR_LAYOUT = dict(height=400, showlegend=False, xaxis_title="Strategy")
+
+def clear_dashboard_cache() -> None:
+    """Drop all cached dashboards (e.g. after a model is retrained)"""
+    with _dashboard_cache_lock:
+        _dashboard_cache.clear()
 
 class StrategyDashboard:
     def __init__(self):
-        self.backtester = BacktestEngine()
         self.data_loader = DataLoader()
     
-    def generate_dashboard(self, asset: str, days: int, initial_capital: float = 10000) -> Dict[str, Any]:
-        """Generate strategy performance dashboard"""
-        
-        # Load data
-        assets_data = self.data_loader.load_all_assets()
-        if asset not in assets_data:
-            raise ValueError(f"Asset {asset} not found")
+    def generate_dashboard(self, asset: str, days: int, initial_capital: float = 10000,
+                           charts_wanted: Optional[Set[str]] = None) -> Dict[str, Any]:
+        """Generate strategy performance dashboard (charts_wanted: chart keys to build, None for all)"""
+        data = load_window(self.data_loader, asset, days)
+        return self._build_dashboard(data, asset, days, initial_capital, charts_wanted)
+    
+    def generate_dashboard_json(self, asset: str, days: int, initial_capital: float = 10000) -> bytes:
+        """Generate the dashboard as JSON bytes, serialized once and cached per data window"""
+        data = load_window(self.data_loader, asset, days)
+        key = (asset, days, initial_capital, model_version(), data.index[-1] if len(data) else None, len(data))
         
-        data = assets_data[asset]
-        if days > 0:
-            # Approximate 5-min bars per day (288 = 24 hours * 12 five-minute bars)
-            data = data.tail(min(len(data), int(days * 288)))
+        with _dashboard_cache_lock:
+            payload = _dashboard_cache.get(key)
+            if payload is not None:
+                _dashboard_cache.move_to_end(key)
+                return payload
         
+        payload = to_json_bytes(self._build_dashboard(data, asset, days, initial_capital))
+        with _dashboard_cache_lock:
+            _dashboard_cache[key] = payload
+            if len(_dashboard_cache) > DASHBOARD_CACHE_SIZE:
+                _dashboard_cache.popitem(last=False)
+        return payload
+    
+    def _build_dashboard(self, data: pd.DataFrame, asset: str, days: int, initial_capital: float,
+                         charts_wanted: Optional[Set[str]] = None) -> Dict[str, Any]:
+        """Run the strategy backtests and assemble charts, metrics and insights"""
         # Strategies to compare
         strategies = ["vwap_ib", "vwap_ml_validated", "sma_crossover", "rsi_oversold"]
         
@@ -39,8 +76,8 @@ class StrategyDashboard:
         # Run backtests for all strategies
         for strategy_id in strategies:
             try:
-                self.backtester.initial_capital = initial_capital
-                result = self.backtester.run_backtest(strategy_id, data, asset)
+                # Shared with the chart endpoints and earlier dashboards on the same data window
+                result, _ = run_backtest_cached(strategy_id, data, asset, initial_capital)
                 
                 if "error" not in result:
                     results[strategy_id] = result
@@ -49,9 +86,23 @@ class StrategyDashboard:
             except Exception as e:
                 print(f"Warning: Could not backtest {strategy_id}: {e}")
         
+        # Trade columns the dashboard reads, lifted once per strategy, and their statistics
+        # computed once for both the charts and the metrics
+        trade_columns = {strategy_id: self._trade_columns(trades)
+                         for strategy_id, trades in all_trades.items() if trades}
+        trade_stats = {strategy_id: self._trade_stats(columns)
+                       for strategy_id, columns in trade_columns.items()}
+        
+        # Display names resolved once from the registry
+        display_names = {}
+        for strategy_id in strategies:
+            strategy_info = registry.get_strategy_info(strategy_id)
+            display_names[strategy_id] = strategy_info["name"] if strategy_info else strategy_id
+        
         # Generate charts and metrics
-        charts = self._create_dashboard_charts(results, all_trades, strategies)
-        metrics = self._calculate_dashboard_metrics(results, strategies)
+        charts = self._create_dashboard_charts(results, trade_columns, trade_stats, display_names, strategies,
+                                               charts_wanted)
+        metrics = self._calculate_dashboard_metrics(results, trade_stats, display_names, strategies)
         insights = self._generate_dashboard_insights(metrics)
         
         return {
@@ -64,137 +115,140 @@ class StrategyDashboard:
             "initial_capital": initial_capital
         }
     
-    def _create_dashboard_charts(self, results: Dict, all_trades: Dict, strategies: List[str]):
-        """Create dashboard charts"""
-        charts = {}
+    @staticmethod
+    def _trade_columns(trades: List[Dict]) -> Dict[str, np.ndarray]:
+        """Exit time, capital and P&L of the trade records as parallel arrays, without building a frame of every field"""
+        return {
+            "exit_time": np.array([trade["exit_time"] for trade in trades], dtype="datetime64[ns]"),
+            "capital": np.fromiter((trade["capital"] for trade in trades), dtype=np.float64, count=len(trades)),
+            "pnl": np.fromiter((trade["pnl"] for trade in trades), dtype=np.float64, count=len(trades)),
+        }
+    
+    def _trade_stats(self, columns: Dict[str, np.ndarray]) -> Dict[str, float]:
+        """Win rate, average win/loss, profit factor and max drawdown of one strategy's trades"""
+        pnl = columns["pnl"]
+        winning_pnl = pnl[pnl > 0]
+        losing_pnl = pnl[pnl < 0]
+        # Gross loss as a positive amount (0 when there are no losing trades)
+        gross_loss = -losing_pnl.sum()
         
-        # 1. Equity Curve Comparison
-        equity_fig = go.Figure()
+        # Calculate max drawdown
+        equity_curve = columns["capital"]
+        rolling_max = np.maximum.accumulate(equity_curve)
+        drawdown = (equity_curve - rolling_max) / rolling_max
         
-        colors = {
-            "vwap_ib": "blue",
-            "vwap_ml_validated": "green", 
-            "sma_crossover": "orange",
-            "rsi_oversold": "red"
+        return {
+            "win_rate": len(winning_pnl) / len(pnl) * 100,
+            "avg_win": winning_pnl.mean() if len(winning_pnl) > 0 else 0,
+            "avg_loss": losing_pnl.mean() if len(losing_pnl) > 0 else 0,
+            "profit_factor": winning_pnl.sum() / gross_loss if gross_loss > 0 else float('inf'),
+            "max_drawdown": drawdown.min() * 100,
         }
+    
+    def _create_dashboard_charts(self, results: Dict, trade_columns: Dict[str, Dict[str, np.ndarray]], trade_stats: Dict,
+                                 display_names: Dict[str, str], strategies: List[str],
+                                 charts_wanted: Optional[Set[str]] = None):
+        """Create dashboard charts (only those in charts_wanted, if given)"""
+        charts = {}
         
-        for strategy_id in strategies:
-            if strategy_id in all_trades and all_trades[strategy_id]:
-                trades = all_trades[strategy_id]
-                times = [trade["exit_time"] for trade in trades]
-                equity = [trade["capital"] for trade in trades]
-                
-                strategy_info = registry.get_strategy_info(strategy_id)
-                display_name = strategy_info["name"] if strategy_info else strategy_id
-                
-                equity_fig.add_trace(go.Scatter(
-                    x=times,
-                    y=equity,
-                    name=display_name,
-                    line=dict(color=colors.get(strategy_id, "gray"), width=3),
-                    hovertemplate="<b>%{x}</b><br>Equity: $%{y:,.2f}<extra></extra>"
-                ))
-        
-        equity_fig.update_layout(
-            title="Strategy Performance Comparison - Equity Curve",
-            xaxis_title="Time",
-            yaxis_title="Portfolio Value ($)",
-            hovermode="x unified",
-            height=500,
-            showlegend=True
-        )
+        def wanted(name: str) -> bool:
+            return charts_wanted is None or name in charts_wanted
         
-        charts["equity_curve"] = equity_fig.to_dict()
+        # 1. Equity Curve Comparison
+        if wanted("equity_curve"):
+            equity_fig = go.Figure()
+            
+            for strategy_id in strategies:
+                if strategy_id in trade_columns:
+                    columns = trade_columns[strategy_id]
+                    
+                    equity_fig.add_trace(go.Scatter(
+                        x=columns["exit_time"],
+                        y=columns["capital"],
+                        name=display_names[strategy_id],
+                        line=dict(color=STRATEGY_COLORS.get(strategy_id, "gray"), width=3),
+                        hovertemplate="<b>%{x}</b><br>Equity: $%{y:,.2f}<extra></extra>"
+                    ))
+            
+            equity_fig.update_layout(
+                title="Strategy Performance Comparison - Equity Curve",
+                xaxis_title="Time",
+                yaxis_title="Portfolio Value ($)",
+                hovermode="x unified",
+                height=500,
+                showlegend=True
+            )
+            
+            charts["equity_curve"] = equity_fig.to_dict()
         
         # 2. Performance Metrics Comparison
+        if not (wanted("returns_chart") or wanted("winrate_chart")):
+            return charts
+        
         metrics_data = []
         for strategy_id in strategies:
             if strategy_id in results:
                 result = results[strategy_id]
-                strategy_info = registry.get_strategy_info(strategy_id)
-                display_name = strategy_info["name"] if strategy_info else strategy_id
                 
                 # Calculate additional metrics
                 trades = result.get("trades", [])
                 if trades:
-                    trades_df = pd.DataFrame(trades)
-                    winning_trades = trades_df[trades_df["pnl"] > 0]
-                    win_rate = len(winning_trades) / len(trades) * 100 if len(trades) > 0 else 0
-                    
                     metrics_data.append({
-                        "Strategy": display_name,
+                        "Strategy": display_names[strategy_id],
                         "Total Return (%)": result.get("total_return", 0) * 100,
-                        "Win Rate (%)": win_rate,
+                        "Win Rate (%)": trade_stats[strategy_id]["win_rate"],
                         "Total Trades": len(trades),
                         "Final Capital ($)": result.get("final_capital", 0)
                     })
         
         if metrics_data:
-            metrics_df = pd.DataFrame(metrics_data)
+            names = [row["Strategy"] for row in metrics_data]
             
-            # Returns bar chart
-            returns_fig = px.bar(
-                metrics_df, 
-                x="Strategy", 
-                y="Total Return (%)",
-                title="Total Returns by Strategy",
-                color="Total Return (%)",
-                color_continuous_scale="RdYlGn",
-                text="Total Return (%)"
-            )
-            returns_fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-            returns_fig.update_layout(height=400, showlegend=False)
-            charts["returns_chart"] = returns_fig.to_dict()
+            def bar_chart(column: str, title: str) -> Dict[str, Any]:
+                # go.Bar straight from the column values, no Plotly Express frame
+                values = np.array([row[column] for row in metrics_data], dtype=np.float64)
+                fig = go.Figure(go.Bar(
+                    x=names,
+                    y=values,
+                    text=values,
+                    texttemplate='%{text:.1f}%',
+                    textposition='outside',
+                    marker=dict(color=values, colorscale="RdYlGn",
+                                colorbar=dict(title=dict(text=column))),
+                    hovertemplate=f"Strategy=%{{x}}<br>{column}=%{{marker.color}}<extra></extra>"
+                ))
+                fig.update_layout(title=title, yaxis_title=column, **BASE_BAR_LAYOUT)
+                return fig.to_dict()
             
-            # Win rate bar chart
-            winrate_fig = px.bar(
-                metrics_df,
-                x="Strategy",
-                y="Win Rate (%)", 
-                title="Win Rate by Strategy",
-                color="Win Rate (%)",
-                color_continuous_scale="RdYlGn",
-                text="Win Rate (%)"
-            )
-            winrate_fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-            winrate_fig.update_layout(height=400, showlegend=False)
-            charts["winrate_chart"] = winrate_fig.to_dict()
+            if wanted("returns_chart"):
+                charts["returns_chart"] = bar_chart("Total Return (%)", "Total Returns by Strategy")
+            if wanted("winrate_chart"):
+                charts["winrate_chart"] = bar_chart("Win Rate (%)", "Win Rate by Strategy")
         
         return charts
     
-    def _calculate_dashboard_metrics(self, results: Dict, strategies: List[str]):
+    def _calculate_dashboard_metrics(self, results: Dict, trade_stats: Dict,
+                                    display_names: Dict[str, str], strategies: List[str]):
         """Calculate performance metrics for dashboard"""
         metrics = {}
         
         for strategy_id in strategies:
             if strategy_id in results:
                 result = results[strategy_id]
-                strategy_info = registry.get_strategy_info(strategy_id)
-                display_name = strategy_info["name"] if strategy_info else strategy_id
                 
                 # Calculate metrics from trades
-                trades = result.get("trades", [])
-                if trades:
-                    trades_df = pd.DataFrame(trades)
-                    winning_trades = trades_df[trades_df["pnl"] > 0]
-                    losing_trades = trades_df[trades_df["pnl"] < 0]
-                    
-                    win_rate = len(winning_trades) / len(trades) * 100 if len(trades) > 0 else 0
-                    avg_win = winning_trades["pnl"].mean() if len(winning_trades) > 0 else 0
-                    avg_loss = losing_trades["pnl"].mean() if len(losing_trades) > 0 else 0
-                    profit_factor = abs(winning_trades["pnl"].sum() / losing_trades["pnl"].sum()) if len(losing_trades) > 0 and losing_trades["pnl"].sum() != 0 else float('inf')
-                    
-                    # Calculate max drawdown
-                    equity_curve = trades_df["capital"]
-                    rolling_max = equity_curve.expanding().max()
-                    drawdown = (equity_curve - rolling_max) / rolling_max
-                    max_drawdown = drawdown.min() * 100
-                    
+                stats = trade_stats.get(strategy_id)
+                if stats:
+                    win_rate = stats["win_rate"]
+                    avg_win = stats["avg_win"]
+                    avg_loss = stats["avg_loss"]
+                    profit_factor = stats["profit_factor"]
+                    max_drawdown = stats["max_drawdown"]
                 else:
                     win_rate = avg_win = avg_loss = max_drawdown = profit_factor = 0
                 
                 metrics[strategy_id] = {
-                    "name": display_name,
+                    "name": display_names[strategy_id],
                     "total_return": round(result.get("total_return", 0) * 100, 2),
                     "total_trades": result.get("total_trades", 0),
                     "win_rate": round(win_rate, 2),
@@ -211,14 +265,20 @@ class StrategyDashboard:
         """Generate insights from dashboard metrics"""
         insights = []
         
-        # Find best performing strategy
-        strategies_with_returns = {
-            k: v for k, v in metrics.items() 
-            if v["total_trades"] > 0 and "ml_validated" not in k
-        }
+        # Best strategy by return, overall and among the non-ML ones, in one pass
+        # (strict > keeps the first of equal returns, as max() does)
+        best_strategy = overall_best = None
+        for strategy_id, strategy_metrics in metrics.items():
+            if strategy_metrics["total_trades"] <= 0:
+                continue
+            total_return = strategy_metrics["total_return"]
+            if overall_best is None or total_return > overall_best[1]["total_return"]:
+                overall_best = (strategy_id, strategy_metrics)
+            if "ml_validated" not in strategy_id and (
+                    best_strategy is None or total_return > best_strategy[1]["total_return"]):
+                best_strategy = (strategy_id, strategy_metrics)
         
-        if strategies_with_returns:
-            best_strategy = max(strategies_with_returns.items(), key=lambda x: x[1]["total_return"])
+        if best_strategy is not None:
             best_ml_strategy = None
             
             # Check ML validated version
@@ -245,13 +305,10 @@ class StrategyDashboard:
                     })
             
             # Overall best strategy
-            all_valid_strategies = {k: v for k, v in metrics.items() if v["total_trades"] > 0}
-            if all_valid_strategies:
-                overall_best = max(all_valid_strategies.items(), key=lambda x: x[1]["total_return"])
-                insights.append({
-                    "type": "info",
-                    "title": "Best Performing Strategy",
-                    "message": f"{overall_best[1]['name']} achieved {overall_best[1]['total_return']:.1f}% return with {overall_best[1]['win_rate']:.1f}% win rate"
-                })
+            insights.append({
+                "type": "info",
+                "title": "Best Performing Strategy",
+                "message": f"{overall_best[1]['name']} achieved {overall_best[1]['total_return']:.1f}% return with {overall_best[1]['win_rate']:.1f}% win rate"
+            })
         
         return insights